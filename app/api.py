@@ -1,10 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.backend.archive import archive_periodically, ARCHIVE_INTERVAL
+from app.backend.compression import CompressionMiddleware
+from app.backend.db import create_schema, DB_CREATE_SCHEMA
+from app.backend.idempotency import IdempotencyMiddleware
+from app.backend.images import shutdown_image_pool
+from app.backend.recommendations import refresh_related_periodically, RELATED_REFRESH_INTERVAL, np
+from app.backend.recommendations import shutdown_related_pool
+from app.backend.profiling import ProfilingMiddleware
+from app.backend.slug_index import load_slug_indexes
+from app.routers.archive import router as archive_router
 from app.routers.categories import router as categories_router
+from app.routers.changes import router as changes_router
 from app.routers.products import router as products_router
+from app.routers.profiling import router as profiling_router
 from app.routers.auth import router as auth_router
 from app.routers.permission import router as permission_router
+from app.routers.reviews import router as reviews_router
+from app.routers.suppliers import router as suppliers_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_CREATE_SCHEMA:
+        await create_schema()
+    await load_slug_indexes()
+    tasks = []
+    if ARCHIVE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(archive_periodically()))
+    if np is not None and RELATED_REFRESH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(refresh_related_periodically()))
+    yield
+    for task in tasks:
+        task.cancel()
+    shutdown_image_pool()
+    shutdown_related_pool()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 
 @app.get("/")
@@ -14,4 +52,10 @@ async def welcome():
 app.include_router(categories_router)
 app.include_router(products_router)
 app.include_router(auth_router)
-app.include_router(permission_router)
\ No newline at end of file
+app.include_router(permission_router)
+app.include_router(reviews_router)
+app.include_router(archive_router)
+app.include_router(suppliers_router)
+app.include_router(changes_router)
+app.include_router(profiling_router)
+
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, exists, func, literal, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.backend.changes import record_change, prune_changes
+from app.backend.db import async_session_maker
+from app.backend.slug_index import product_slugs, category_slugs
+from app.backend.snapshots import invalidate_snapshots
+from app.backend.supplier_stats import track_products, track_review
+from app.models import Product, Category, Review, User, CatalogSnapshot, archive_tables
+
+ARCHIVE_AFTER = timedelta(days=int(os.getenv('ARCHIVE_AFTER_DAYS', 30)))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE_SECONDS', 0.1))
+ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL_SECONDS', 3600))
+
+slug_indexes = {Product: product_slugs, Category: category_slugs}
+change_entities = {Product: 'product', Category: 'category', Review: 'review'}
+child_category = aliased(Category)
+logger = logging.getLogger(__name__)
+
+# Строки, на которые ещё ссылаются горячие таблицы, переносить нельзя,
+# поэтому порядок важен: сначала отзывы, затем товары, категории и пользователи.
+# Отзывы удалённого товара переносятся вместе с ним и товар не блокируют
+references = {
+    Review: (),
+    Product: (),
+    Category: (Product.category_id, child_category.parent_id),
+    User: (Product.supplier_id, Review.user_id),
+}
+
+
+class RestoreError(Exception):
+    pass
+
+
+async def archive_batch(db: AsyncSession, model, cutoff: datetime) -> int:
+    query = select(model.id).where(model.is_active == False, model.deactivated_at < cutoff)
+    for column in references[model]:
+        query = query.where(~exists().where(column == model.id))
+    query = query.order_by(model.id).limit(ARCHIVE_BATCH_SIZE).with_for_update(skip_locked=True)
+    ids = (await db.scalars(query)).all()
+    if not ids:
+        return 0
+
+    slugs = []
+    if model in slug_indexes:
+        slugs = (await db.scalars(select(model.slug).where(model.id.in_(ids)))).all()
+
+    archived_at = datetime.now()
+    if model is Product:
+        await archive_product_reviews(db, ids, archived_at)
+    await move_to_archive(db, model, model.id.in_(ids), archived_at)
+    if model is Category:
+        await db.execute(delete(CatalogSnapshot).where(CatalogSnapshot.category_id.in_(ids)))
+    await db.commit()
+
+    for slug in slugs:
+        slug_indexes[model].discard(slug)
+    return len(ids)
+
+
+async def move_to_archive(db: AsyncSession, model, condition, archived_at: datetime):
+    archive = archive_tables[model]
+    columns = [column.name for column in model.__table__.columns]
+    await db.execute(archive.insert().from_select(
+        columns + ['archived_at'],
+        select(*model.__table__.columns, literal(archived_at, archive.c.archived_at.type)).where(condition)))
+    await db.execute(delete(model).where(condition))
+
+
+async def archive_product_reviews(db: AsyncSession, product_ids: list[int], archived_at: datetime):
+    # Строки товаров уже заблокированы FOR UPDATE, поэтому новый отзыв на них не появится до commit
+    grades = await db.execute(select(Product.supplier_id, Review.grade, func.count(Review.id)).join(Product).where(
+        Review.product_id.in_(product_ids), Review.is_active == True).group_by(Product.supplier_id, Review.grade))
+    for supplier_id, grade, count in grades.all():
+        await track_review(db, supplier_id, grade, delta=-count)
+    await move_to_archive(db, Review, Review.product_id.in_(product_ids), archived_at)
+
+
+async def restore_product_reviews(db: AsyncSession, product_id: int, supplier_id: int | None, archived_at: datetime):
+    # Отзывы, перенесённые в архив вместе с товаром, возвращаются вместе с ним
+    archive = archive_tables[Review]
+    condition = (archive.c.product_id == product_id) & (archive.c.archived_at == archived_at)
+    rows = (await db.execute(select(archive).where(condition))).mappings().all()
+    if not rows:
+        return
+    columns = [column.name for column in Review.__table__.columns]
+    await db.execute(Review.__table__.insert(), [{name: row[name] for name in columns} for row in rows])
+    await db.execute(delete(archive).where(condition))
+    for row in rows:
+        if row['is_active']:
+            await track_review(db, supplier_id, row['grade'])
+
+
+async def table_stats(db: AsyncSession) -> dict:
+    stats = {}
+    for model, archive in archive_tables.items():
+        table = model.__tablename__
+        stats[table] = {
+            'rows': await db.scalar(select(func.count()).select_from(model)),
+            'inactive': await db.scalar(select(func.count()).where(model.is_active == False)),
+            'archived': await db.scalar(select(func.count()).select_from(archive)),
+        }
+        if db.get_bind().dialect.name == 'postgresql':
+            row = (await db.execute(text(
+                'SELECT n_live_tup, n_dead_tup, pg_total_relation_size(relid) '
+                'FROM pg_stat_user_tables WHERE relname = :table'), {'table': table})).first()
+            if row is not None:
+                stats[table].update(live_tuples=row[0], dead_tuples=row[1], total_bytes=row[2])
+    return stats
+
+
+async def run_archival(older_than: timedelta = ARCHIVE_AFTER) -> dict:
+    cutoff = datetime.now() - older_than
+    async with async_session_maker() as session:
+        before = await table_stats(session)
+
+    archived = {}
+    for model in archive_tables:
+        archived[model.__tablename__] = 0
+        while True:
+            # Каждая пачка — отдельная короткая транзакция, чтобы не держать блокировки
+            async with async_session_maker() as session:
+                moved = await archive_batch(session, model, cutoff)
+            if not moved:
+                break
+            archived[model.__tablename__] += moved
+            await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
+
+    pruned_changes = 0
+    while True:
+        async with async_session_maker() as session:
+            pruned = await prune_changes(session, ARCHIVE_BATCH_SIZE)
+        if not pruned:
+            break
+        pruned_changes += pruned
+        await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
+
+    async with async_session_maker() as session:
+        after = await table_stats(session)
+
+    return {
+        'archived': archived,
+        'pruned_changes': pruned_changes,
+        'before': before,
+        'after': after,
+    }
+
+
+async def archive_periodically():
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+        try:
+            await run_archival()
+        except Exception:
+            # Ошибка одного прогона не должна останавливать фоновую задачу
+            logger.exception('Archival run failed')
+
+
+async def check_parents(db: AsyncSession, model, values: dict):
+    # SQLite не проверяет внешние ключи, поэтому родительские строки проверяются явно
+    for foreign_key in model.__table__.foreign_keys:
+        value = values[foreign_key.parent.name]
+        parent = select(foreign_key.column).where(foreign_key.column == value)
+        if value is not None and await db.scalar(parent) is None:
+            raise RestoreError(f'Restore the parent rows first: {foreign_key.column.table.name} {value} is archived')
+
+
+async def track_restored(db: AsyncSession, model, values: dict):
+    if model in change_entities:
+        await record_change(db, change_entities[model], values['id'], 'restore', values.get('slug'))
+    if model is Product:
+        await invalidate_snapshots(db, values['category_id'])
+        await track_products(db, values['supplier_id'], products=1, stock=values['stock'] or 0)
+    elif model is Review:
+        product = await db.get(Product, values['product_id'])
+        if product is None:
+            raise RestoreError('Restore the parent rows first')
+        await track_review(db, product.supplier_id, values['grade'])
+
+
+async def restore(db: AsyncSession, model, item_id: int):
+    item = await db.get(model, item_id)
+    if item is not None:
+        if not item.is_active:
+            values = {column.name: getattr(item, column.name) for column in model.__table__.columns}
+            await check_parents(db, model, values)
+            await track_restored(db, model, values)
+        item.is_active = True
+        item.deactivated_at = None
+        await db.commit()
+        return item
+
+    archive = archive_tables[model]
+    row = (await db.execute(select(archive).where(archive.c.id == item_id))).mappings().first()
+    if row is None:
+        return None
+
+    values = {column.name: row[column.name] for column in model.__table__.columns}
+    values.update(is_active=True, deactivated_at=None)
+    if model in slug_indexes and await slug_indexes[model].resolve(db, values['slug']) is not None:
+        raise RestoreError(f"Slug {values['slug']} is already taken")
+    await check_parents(db, model, values)
+
+    try:
+        await db.execute(model.__table__.insert().values(**values))
+        await db.execute(delete(archive).where(archive.c.id == item_id))
+        if model is Product:
+            await restore_product_reviews(db, item_id, values['supplier_id'], row['archived_at'])
+        await track_restored(db, model, values)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise RestoreError('Restore the parent rows first')
+
+    if model in slug_indexes:
+        slug_indexes[model].add(values['slug'], item_id)
+    return await db.get(model, item_id)
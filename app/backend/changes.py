@@ -0,0 +1,64 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, delete, event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Change
+
+CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', 500))
+CHANGES_POLL_INTERVAL = float(os.getenv('CHANGES_POLL_INTERVAL_SECONDS', 5))
+CHANGES_RETENTION = timedelta(days=int(os.getenv('CHANGES_RETENTION_DAYS', 7)))
+CHANGES_LOCK_KEY = 0x636867
+
+_changed = asyncio.Event()
+
+
+async def record_change(db: AsyncSession, entity: str, entity_id: int, action: str, slug: str | None = None):
+    # Номер seq выдаётся при вставке, а видимой строка становится при commit. Чтобы потребитель
+    # не перескочил ещё не закоммиченный seq, транзакции с изменениями выполняются по очереди
+    # от первой записи в журнал до commit; в SQLite запись и так сериализована блокировкой базы
+    if not db.sync_session.info.get('has_changes') and db.get_bind().dialect.name == 'postgresql':
+        await db.execute(select(func.pg_advisory_xact_lock(CHANGES_LOCK_KEY)))
+    await db.execute(insert(Change).values(entity=entity,
+                                           entity_id=entity_id,
+                                           action=action,
+                                           slug=slug,
+                                           created_at=datetime.now()))
+    db.sync_session.info['has_changes'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def wake_change_streams(session: Session):
+    global _changed
+    if session.info.pop('has_changes', False):
+        _changed.set()
+        _changed = asyncio.Event()
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_changes(session: Session):
+    session.info.pop('has_changes', None)
+
+
+async def wait_for_changes(timeout: float = CHANGES_POLL_INTERVAL):
+    try:
+        await asyncio.wait_for(_changed.wait(), timeout)
+    except asyncio.TimeoutError:
+        return
+
+
+async def changes_since(db: AsyncSession, since: int, limit: int = CHANGES_PAGE_SIZE) -> list[Change]:
+    changes = await db.scalars(select(Change).where(Change.seq > since).order_by(Change.seq).limit(limit))
+    return changes.all()
+
+
+async def prune_changes(db: AsyncSession, batch_size: int) -> int:
+    # Потребитель, отставший больше чем на CHANGES_RETENTION, должен заново выполнить полную синхронизацию
+    expired = (select(Change.seq).where(Change.created_at < datetime.now() - CHANGES_RETENTION)
+               .order_by(Change.seq).limit(batch_size))
+    result = await db.execute(delete(Change).where(Change.seq.in_(expired.scalar_subquery())))
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,167 @@
+import gzip
+import os
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 500))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', 3))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 5))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+
+CACHEABLE_PATHS = ('/products/', '/categories/', '/reviews/')
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def available_encodings() -> list[str]:
+    # Порядок — предпочтение сервера при равных q у клиента
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+def compress(body: bytes, encoding: str, level: int | None = None) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL if level is None else level).compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, GZIP_LEVEL if level is None else level)
+    raise ValueError(f'Unsupported encoding {encoding}')
+
+
+def choose_encoding(accept_encoding: str, encodings: tuple[str, ...] | None = None) -> str | None:
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    candidates = [(accepted.get(encoding, accepted.get('*', 0.0)), -position, encoding)
+                  for position, encoding in enumerate(encodings or available_encodings())]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_size: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1:]
+
+    def put(self, key: tuple, status: int, headers: list, body: bytes):
+        self._entries[key] = (time.monotonic() + self.ttl, status, headers, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, cache: ResponseCache | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.lower(): value for name, value in scope['headers']}
+        encoding = choose_encoding(headers.get(b'accept-encoding', b'').decode('latin-1'))
+        method = scope['method']
+
+        cache_key = None
+        if method == 'GET' and scope['path'] in CACHEABLE_PATHS:
+            cache_key = (scope['path'], scope['query_string'], encoding)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                status, response_headers, body = cached
+                await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+                await send({'type': 'http.response.body', 'body': body})
+                return
+
+        start_message = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streaming
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if streaming:
+                await send(message)
+                return
+
+            if message['type'] != 'http.response.body' or message.get('more_body', False):
+                # Потоковые ответы (SSE, файлы) отдаём как есть
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            status, response_headers, body = self.encode(start_message, message.get('body', b''), encoding)
+            if method not in ('GET', 'HEAD') and status < 400:
+                self.cache.clear()
+            elif cache_key is not None and status == 200:
+                self.cache.put(cache_key, status, response_headers, body)
+
+            await send({**start_message, 'headers': response_headers})
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def encode(self, start_message: dict, body: bytes, encoding: str | None) -> tuple[int, list, bytes]:
+        status = start_message['status']
+        headers = list(start_message.get('headers', []))
+        names = {name.lower(): value for name, value in headers}
+        content_type = names.get(b'content-type', b'').decode('latin-1')
+
+        if (encoding is None or len(body) < self.minimum_size or b'content-encoding' in names
+                or not content_type.startswith(COMPRESSIBLE_TYPES)):
+            return status, headers, body
+
+        body = compress(body, encoding)
+        vary = names.get(b'vary')
+        headers = [(name, value) for name, value in headers if name.lower() not in (b'content-length', b'vary')]
+        headers += [
+            (b'content-encoding', encoding.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'vary', vary + b', Accept-Encoding' if vary else b'Accept-Encoding'),
+        ]
+        return status, headers, body
@@ -1,10 +1,80 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.backend.db import async_session_maker
+from app.backend.timing import timing
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
-        yield session
\ No newline at end of file
+class LazySession:
+    # Сессия создаётся только при первом обращении к базе и закрывается сразу после commit,
+    # чтобы соединение не удерживалось до отправки ответа
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession] | None = None):
+        self._session_maker = session_maker or async_session_maker
+        self._session: AsyncSession | None = None
+        self._connected = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_maker()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    async def checkout(self) -> AsyncSession:
+        session = self.session
+        if not self._connected:
+            with timing('db-checkout'):
+                await session.connection()
+            self._connected = True
+        return session
+
+    async def execute(self, *args, **kwargs):
+        session = await self.checkout()
+        with timing('db-query'):
+            return await session.execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        session = await self.checkout()
+        with timing('db-query'):
+            return await session.scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        session = await self.checkout()
+        with timing('db-query'):
+            return await session.scalars(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        session = await self.checkout()
+        with timing('db-query'):
+            return await session.get(*args, **kwargs)
+
+    async def commit(self):
+        if self._session is not None:
+            await self._session.commit()
+            await self.release()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+            await self.release()
+
+    async def release(self):
+        if self._session is not None:
+            session, self._session = self._session, None
+            self._connected = False
+            await session.close()
+
+
+async def get_db() -> AsyncGenerator[LazySession, None]:
+    session = LazySession()
+    try:
+        yield session
+    finally:
+        await session.release()
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', 10000))
+IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 30))
+
+IDEMPOTENT_PATHS = ('/products/', '/reviews/', '/auth/')
+
+
+class IdempotencyEntry:
+    def __init__(self, fingerprint: str, ttl: float):
+        self.fingerprint = fingerprint
+        self.expires = time.monotonic() + ttl
+        self.done = asyncio.Event()
+        self.response: tuple[int, list, bytes] | None = None
+
+
+class IdempotencyStore:
+    # Ключи хранятся в памяти процесса: гарантия действует только при одном воркере,
+    # повтор, попавший в другой воркер, выполнится ещё раз
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: OrderedDict[tuple, IdempotencyEntry] = OrderedDict()
+
+    def get(self, key: tuple) -> IdempotencyEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def begin(self, key: tuple, fingerprint: str) -> IdempotencyEntry:
+        entry = IdempotencyEntry(fingerprint, self.ttl)
+        self._entries[key] = entry
+        if len(self._entries) > self.max_keys:
+            self.evict(len(self._entries) - self.max_keys)
+        return entry
+
+    def evict(self, count: int):
+        # Незавершённые запросы не вытесняем, иначе ожидающие повторы выполнятся заново
+        finished = (key for key, entry in self._entries.items() if entry.done.is_set())
+        for key in list(itertools.islice(finished, count)):
+            del self._entries[key]
+
+    def finish(self, key: tuple, entry: IdempotencyEntry, response: tuple[int, list, bytes] | None):
+        # Ответы 5xx не запоминаем: повтор с тем же ключом выполнится заново
+        entry.response = response
+        if response is None and self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: IdempotencyStore | None = None):
+        self.app = app
+        self.store = store if store is not None else IdempotencyStore()
+
+    async def __call__(self, scope, receive, send):
+        headers = {name.lower(): value for name, value in scope.get('headers', [])}
+        idempotency_key = headers.get(b'idempotency-key')
+        if (scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in IDEMPOTENT_PATHS
+                or not idempotency_key):
+            await self.app(scope, receive, send)
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        key = (headers.get(b'authorization', b''), idempotency_key)
+        fingerprint = hashlib.sha256(b'\n'.join((scope['path'].encode('utf-8'), scope['query_string'],
+                                                 headers.get(b'content-type', b''), body))).hexdigest()
+
+        while True:
+            entry = self.store.get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                await self.respond(send, 422, {'detail': 'Idempotency-Key was already used with another request'})
+                return
+            try:
+                await asyncio.wait_for(entry.done.wait(), IDEMPOTENCY_WAIT)
+            except asyncio.TimeoutError:
+                await self.respond(send, 409, {'detail': 'Request with this Idempotency-Key is still in progress'})
+                return
+            if entry.response is not None:
+                status, response_headers, response_body = entry.response
+                await send({'type': 'http.response.start', 'status': status,
+                            'headers': response_headers + [(b'idempotent-replayed', b'true')]})
+                await send({'type': 'http.response.body', 'body': response_body})
+                return
+
+        entry = self.store.begin(key, fingerprint)
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        start_message = None
+        chunks = []
+        complete = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, complete
+            if message['type'] == 'http.response.start':
+                start_message = message
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                complete = not message.get('more_body', False)
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+            if start_message is not None and complete and start_message['status'] < 500:
+                response = (start_message['status'], list(start_message.get('headers', [])), b''.join(chunks))
+        finally:
+            self.store.finish(key, entry, response)
+
+    @staticmethod
+    async def respond(send, status: int, content: dict):
+        body = json.dumps(content).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode('latin-1'))]})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from starlette.responses import FileResponse
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_ROOT = Path(os.getenv('IMAGE_ROOT', 'media/products')).resolve()
+IMAGE_CACHE_DIR = Path(os.getenv('IMAGE_CACHE_DIR', 'media/cache')).resolve()
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', os.cpu_count() or 1))
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
+IMAGE_HASH_CACHE_SIZE = int(os.getenv('IMAGE_HASH_CACHE_SIZE', 10000))
+IMAGE_PIN_MAX_AGE = int(os.getenv('IMAGE_PIN_MAX_AGE_SECONDS', 3600))
+IMAGE_READ_ATTEMPTS = 3
+
+IMAGE_WIDTHS = (64, 128, 256, 512, 1024)
+IMAGE_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+_pool: ProcessPoolExecutor | None = None
+_content_hashes: OrderedDict[tuple, str] = OrderedDict()
+_rendering: dict[str, asyncio.Future] = {}
+
+
+def render_derivative(source: str, target: str, width: int, pil_format: str, quality: int):
+    # Выполняется в отдельном процессе пула
+    with Image.open(source) as image:
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if pil_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        temporary = f'{target}.{os.getpid()}.tmp'
+        image.save(temporary, pil_format, quality=quality)
+    os.replace(temporary, target)
+
+
+class DerivativeCache:
+    # LRU по суммарному размеру файлов в каталоге; каталог общий для всех воркеров,
+    # поэтому и наличие файла, и общий размер берутся с диска, а порядок — по atime
+    def __init__(self, directory: Path = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.pins = directory / 'pins'
+        self.max_bytes = max_bytes
+
+    def path(self, name: str) -> Path:
+        return self.directory / name
+
+    def get(self, name: str) -> Path | None:
+        path = self.path(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        # atime обновляется явно: файловая система может быть смонтирована с noatime
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        return path
+
+    def entries(self) -> list[tuple[int, str, int]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime_ns, entry.name, stat.st_size))
+        return sorted(entries)
+
+    def total(self) -> int:
+        return sum(size for _, _, size in self.entries())
+
+    def add(self, name: str):
+        entries = [entry for entry in self.entries() if entry[1] != name]
+        total = sum(size for _, _, size in entries) + self.path(name).stat().st_size
+        for _, evicted, size in entries:
+            if total <= self.max_bytes:
+                break
+            self.path(evicted).unlink(missing_ok=True)
+            total -= size
+        self.prune_pins()
+
+    def pin(self, name: str) -> Path:
+        # Жёсткая ссылка держит inode, пока ответ отдаётся, даже если очистка удалит файл из кэша
+        self.pins.mkdir(parents=True, exist_ok=True)
+        pin = self.pins / f'{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex}-{name}'
+        os.link(self.path(name), pin)
+        return pin
+
+    def prune_pins(self, max_age: int = IMAGE_PIN_MAX_AGE):
+        # Ссылки остаются, если воркер упал посреди ответа
+        if not self.pins.exists():
+            return
+        deadline = time.time_ns() - max_age * 1_000_000_000
+        for entry in os.scandir(self.pins):
+            created = entry.name.split('-', 1)[0]
+            if created.isdigit() and int(created) < deadline:
+                Path(entry.path).unlink(missing_ok=True)
+
+
+class PinnedFileResponse(FileResponse):
+    # Отдаёт закреплённую производную (через http.response.pathsend, если сервер его поддерживает)
+    # и удаляет ссылку в любом случае, в том числе при обрыве соединения
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            Path(self.path).unlink(missing_ok=True)
+
+
+derivative_cache = DerivativeCache()
+
+
+def image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_image_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def original_path(image_url: str | None) -> Path | None:
+    if not image_url or '://' in image_url:
+        return None
+    path = (IMAGE_ROOT / image_url.lstrip('/')).resolve()
+    if not path.is_relative_to(IMAGE_ROOT) or not path.is_file():
+        return None
+    return path
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def content_hash(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    digest = _content_hashes.get(key)
+    if digest is None:
+        digest = await asyncio.to_thread(hash_file, path)
+        _content_hashes[key] = digest
+        # Старые ключи (прежние mtime, удалённые файлы) вытесняются первыми
+        while len(_content_hashes) > IMAGE_HASH_CACHE_SIZE:
+            _content_hashes.popitem(last=False)
+    else:
+        _content_hashes.move_to_end(key)
+    return digest
+
+
+def derivative_name(digest: str, width: int, image_format: str) -> str:
+    return f'{digest[:32]}-{width}.{image_format}'
+
+
+async def get_derivative(source: Path, digest: str, width: int, image_format: str) -> Path:
+    name = derivative_name(digest, width, image_format)
+    path = derivative_cache.get(name)
+    if path is not None:
+        return path
+
+    pending = _rendering.get(name)
+    if pending is not None:
+        await pending
+        return derivative_cache.path(name)
+
+    loop = asyncio.get_running_loop()
+    pending = _rendering[name] = loop.create_future()
+    try:
+        derivative_cache.directory.mkdir(parents=True, exist_ok=True)
+        await loop.run_in_executor(image_pool(), render_derivative, str(source), str(derivative_cache.path(name)),
+                                   width, IMAGE_FORMATS[image_format][0], IMAGE_QUALITY)
+        await asyncio.to_thread(derivative_cache.add, name)
+        pending.set_result(None)
+    except Exception as error:
+        pending.set_exception(error)
+        raise
+    finally:
+        del _rendering[name]
+    return derivative_cache.path(name)
+
+
+async def pin_derivative(source: Path, digest: str, width: int, image_format: str) -> Path:
+    # Очистка кэша в другом запросе или воркере может удалить файл между проверкой и закреплением,
+    # тогда производная строится заново
+    for attempt in range(IMAGE_READ_ATTEMPTS):
+        await get_derivative(source, digest, width, image_format)
+        try:
+            return derivative_cache.pin(derivative_name(digest, width, image_format))
+        except FileNotFoundError:
+            if attempt == IMAGE_READ_ATTEMPTS - 1:
+                raise
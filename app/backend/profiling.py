@@ -0,0 +1,160 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.backend.timing import RequestTimings, request_timings
+from app.routers.auth import get_current_user
+
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL_SECONDS', 0.001))
+PROFILE_MAX_WINDOW = int(os.getenv('PROFILE_MAX_WINDOW_SECONDS', 300))
+
+
+class SamplingProfiler:
+    # Снимает стек потока с event loop через sys._current_frames и копит его
+    # в формате folded stacks (flamegraph.pl, speedscope, inferno).
+    # Без task профилируется весь воркер, с task — только шаги этой задачи
+    # (работа в threadpool и дочерних задачах в профиль не попадает)
+    def __init__(self, thread_id: int | None = None, interval: float = PROFILE_INTERVAL,
+                 task: asyncio.Task | None = None):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.task = task
+        self.loop = task.get_loop() if task is not None else None
+        self.samples: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.stopper: asyncio.Task | None = None
+
+    @property
+    def scope(self) -> str:
+        return 'task' if self.task is not None else 'worker'
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.folded()
+
+    def folded(self) -> str:
+        with self._lock:
+            samples = self.samples.copy()
+        return ''.join(f'{stack} {count}\n' for stack, count in samples.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                with self._lock:
+                    self.samples[';'.join(reversed(stack))] += 1
+
+
+window_profiler: SamplingProfiler | None = None
+
+
+async def profile_window(seconds: int) -> SamplingProfiler:
+    global window_profiler
+    window_profiler = SamplingProfiler()
+    window_profiler.start()
+    profiler = window_profiler
+
+    async def stop_later():
+        await asyncio.sleep(seconds)
+        profiler.stop()
+
+    # Ссылка на задачу хранится в профайлере, иначе её может собрать сборщик мусора
+    profiler.stopper = asyncio.get_running_loop().create_task(stop_later())
+    return profiler
+
+
+async def is_admin_request(headers: dict) -> bool:
+    scheme, _, token = headers.get(b'authorization', b'').decode('latin-1').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    try:
+        user = await get_current_user(token)
+    except HTTPException:
+        return False
+    return bool(user.get('is_admin'))
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.lower(): value for name, value in scope['headers']}
+        profile = headers.get(b'x-profile', b'').lower() in (b'1', b'true')
+        if not profile and headers.get(b'x-server-timing', b'').lower() not in (b'1', b'true'):
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            # Разбивка времени раскрывает устройство сервера, поэтому отдаётся только администраторам
+            if not await is_admin_request(headers):
+                request_timings.set(None)
+                await self.app(scope, receive, send)
+                return
+
+            if profile:
+                await self.profile(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message['type'] == 'http.response.start':
+                    message = {**message, 'headers': list(message.get('headers', []))
+                               + [(b'server-timing', timings.header().encode('latin-1'))]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timings.reset(token)
+
+    async def profile(self, scope, receive, send):
+        status = None
+
+        async def discard(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        profiler = SamplingProfiler(task=asyncio.current_task())
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            body = profiler.stop().encode('utf-8')
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/plain; charset=utf-8'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'x-profile-original-status', str(status).encode('latin-1')),
+            (b'x-profile-scope', profiler.scope.encode('latin-1')),
+            (b'server-timing', request_timings.get().header().encode('latin-1')),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
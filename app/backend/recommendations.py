@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select, distinct, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker, dialect_insert
+from app.models import Product, Review, RelatedProducts
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+RELATED_TOP_K = int(os.getenv('RELATED_TOP_K', 10))
+RELATED_CHUNK_SIZE = int(os.getenv('RELATED_CHUNK_SIZE', 2048))
+RELATED_REFRESH_INTERVAL = int(os.getenv('RELATED_REFRESH_INTERVAL_SECONDS', 60))
+RELATED_LOCK_KEY = 0x72656c
+
+logger = logging.getLogger(__name__)
+_pool: ProcessPoolExecutor | None = None
+
+
+async def mark_related_stale(db: AsyncSession, product_id: int, user_id: int):
+    # Новый отзыв меняет совместную встречаемость товара со всеми товарами,
+    # которые этот пользователь уже оценивал
+    reviewed = await db.scalars(select(Review.product_id).where(Review.user_id == user_id,
+                                                                Review.is_active == True).distinct())
+    product_ids = set(reviewed.all()) | {product_id}
+    statement = dialect_insert(db)(RelatedProducts).values(
+        [{'product_id': item_id, 'related_ids': [], 'is_stale': True, 'stale_version': 1}
+         for item_id in product_ids])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[RelatedProducts.product_id],
+        set_={'is_stale': True, 'stale_version': RelatedProducts.stale_version + 1}))
+
+
+def top_related(matrix, targets, norms, top_k: int = RELATED_TOP_K) -> dict:
+    # Косинусная близость столбцов бинарной матрицы пользователи × товары,
+    # считается пачками столбцов, чтобы не строить полную матрицу товары × товары
+    transposed = matrix.T.tocsr()
+    related = {}
+    for start in range(0, len(targets), RELATED_CHUNK_SIZE):
+        chunk = targets[start:start + RELATED_CHUNK_SIZE]
+        cooccurrence = (transposed @ matrix[:, chunk]).tocsc()
+        for position, target in enumerate(chunk):
+            column = slice(cooccurrence.indptr[position], cooccurrence.indptr[position + 1])
+            indices = cooccurrence.indices[column]
+            scores = cooccurrence.data[column] / (norms[indices] * norms[target])
+            scores[indices == target] = -1
+            if len(indices) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                indices, scores = indices[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            related[int(target)] = indices[order][scores[order] > 0]
+    return related
+
+
+def compute_related(pairs, product_ids: list[int] | None, reviewer_counts: dict[int, int] | None,
+                    top_k: int = RELATED_TOP_K) -> dict[int, list[int]]:
+    # Выполняется в отдельном процессе, чтобы расчёт не блокировал event loop.
+    # При частичном пересчёте матрица содержит только отзывы пользователей, оценивших целевые товары,
+    # поэтому нормы столбцов берутся из reviewer_counts по всем отзывам
+    if not len(pairs):
+        return {}
+    user_ids, item_ids = pairs.T
+    _, user_index = np.unique(user_ids, return_inverse=True)
+    products, product_index = np.unique(item_ids, return_inverse=True)
+    matrix = sparse.csr_matrix((np.ones(len(pairs), dtype=np.float32), (user_index, product_index)),
+                               shape=(user_index.max() + 1, len(products)))
+    if reviewer_counts is None:
+        norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    else:
+        norms = np.sqrt(np.array([reviewer_counts[int(item_id)] for item_id in products], dtype=np.float32))
+
+    if product_ids is None:
+        targets = np.arange(len(products))
+    else:
+        positions = {int(item_id): position for position, item_id in enumerate(products)}
+        targets = np.array([positions[item_id] for item_id in product_ids if item_id in positions], dtype=np.int64)
+
+    return {int(products[target]): [int(products[index]) for index in related]
+            for target, related in top_related(matrix, targets, norms, top_k).items()}
+
+
+def related_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=1)
+    return _pool
+
+
+def shutdown_related_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def load_reviews(db: AsyncSession, product_ids: list[int] | None):
+    active = select(Review.user_id, Review.product_id).where(Review.is_active == True)
+    if product_ids is None:
+        rows = (await db.execute(active.distinct())).all()
+        return np.array(rows, dtype=np.int64).reshape(-1, 2), None
+
+    # Для пересчёта нужны только отзывы пользователей, которые оценивали целевые товары,
+    # и число оценивших каждый из попавших в них товаров
+    reviewers = select(Review.user_id).where(Review.product_id.in_(product_ids), Review.is_active == True)
+    rows = (await db.execute(active.where(Review.user_id.in_(reviewers)).distinct())).all()
+    candidates = select(Review.product_id).where(Review.user_id.in_(reviewers), Review.is_active == True)
+    counts = await db.execute(select(Review.product_id, func.count(distinct(Review.user_id)))
+                              .where(Review.product_id.in_(candidates), Review.is_active == True)
+                              .group_by(Review.product_id))
+    return np.array(rows, dtype=np.int64).reshape(-1, 2), dict(counts.all())
+
+
+async def refresh_related(db: AsyncSession, product_ids: list[int] | None = None) -> int:
+    # Версии читаются до загрузки отзывов: если за время расчёта строку снова пометили устаревшей,
+    # версия изменится и пометка не будет снята
+    versions = select(RelatedProducts.product_id, RelatedProducts.stale_version)
+    if product_ids is not None:
+        versions = versions.where(RelatedProducts.product_id.in_(product_ids))
+    versions = dict((await db.execute(versions)).all())
+
+    pairs, reviewer_counts = await load_reviews(db, product_ids)
+    related = await asyncio.get_running_loop().run_in_executor(related_pool(), compute_related, pairs,
+                                                               product_ids, reviewer_counts, RELATED_TOP_K)
+    targets = set(versions) | set(related) | set(product_ids or ())
+    rows = {item_id: related.get(item_id, []) for item_id in sorted(targets)}
+
+    now = datetime.now()
+    items = list(rows.items())
+    for start in range(0, len(items), RELATED_CHUNK_SIZE):
+        statement = dialect_insert(db)(RelatedProducts).values(
+            [{'product_id': item_id, 'related_ids': related, 'is_stale': False,
+              'stale_version': versions.get(item_id, 0), 'refreshed_at': now}
+             for item_id, related in items[start:start + RELATED_CHUNK_SIZE]])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[RelatedProducts.product_id],
+            set_={'related_ids': statement.excluded.related_ids,
+                  'is_stale': RelatedProducts.stale_version != statement.excluded.stale_version,
+                  'refreshed_at': now}))
+    await db.commit()
+    return len(rows)
+
+
+async def refresh_stale_related(db: AsyncSession) -> int:
+    # Пересчёт выполняет один воркер: остальные пропускают прогон, пока блокировка занята
+    if db.get_bind().dialect.name == 'postgresql' and not await db.scalar(
+            select(func.pg_try_advisory_xact_lock(RELATED_LOCK_KEY))):
+        return 0
+    stale = await db.scalars(select(RelatedProducts.product_id).where(RelatedProducts.is_stale == True))
+    product_ids = sorted(stale.all())
+    if not product_ids:
+        return 0
+    return await refresh_related(db, product_ids)
+
+
+async def refresh_related_periodically():
+    while True:
+        await asyncio.sleep(RELATED_REFRESH_INTERVAL)
+        try:
+            async with async_session_maker() as session:
+                await refresh_stale_related(session)
+        except Exception:
+            logger.exception('Related products refresh failed')
+
+
+async def related_products(db: AsyncSession, product_id: int) -> list[Product]:
+    row = await db.get(RelatedProducts, product_id)
+    if row is None or not row.related_ids:
+        return []
+    products = await db.scalars(select(Product).where(Product.id.in_(row.related_ids),
+                                                      Product.is_active == True,
+                                                      Product.stock > 0))
+    by_id = {product.id: product for product in products.all()}
+    return [by_id[item_id] for item_id in row.related_ids if item_id in by_id]
+
+
+async def rebuild_related():
+    async with async_session_maker() as session:
+        count = await refresh_related(session)
+    shutdown_related_pool()
+    print(f'Related products rebuilt for {count} products')
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_related())
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker, dialect_insert
+from app.models import RoleVersion
+
+ROLE_VERSIONS_TTL = float(os.getenv('ROLE_VERSIONS_TTL_SECONDS', 5))
+
+
+class RoleVersions:
+    # В таблице только пользователи, чьи роли менялись, поэтому она целиком помещается в память
+    def __init__(self, ttl: float = ROLE_VERSIONS_TTL):
+        self.ttl = ttl
+        self._versions: dict[int, int] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def refresh(self):
+        async with async_session_maker() as session:
+            rows = await session.execute(select(RoleVersion.user_id, RoleVersion.version))
+            self._versions = dict(rows.all())
+        self._loaded_at = time.monotonic()
+
+    async def current(self, user_id: int) -> int:
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    await self.refresh()
+        return self._versions.get(user_id, 0)
+
+    def update(self, versions: dict[int, int]):
+        for user_id, version in versions.items():
+            self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+
+role_versions = RoleVersions()
+
+
+async def bump_role_versions(db: AsyncSession, user_ids: list[int]) -> dict[int, int]:
+    # Вызывающий код делает commit, после чего передаёт результат в role_versions.update
+    if not user_ids:
+        return {}
+    statement = dialect_insert(db)(RoleVersion).values([{'user_id': user_id, 'version': 1} for user_id in user_ids])
+    statement = statement.on_conflict_do_update(index_elements=[RoleVersion.user_id],
+                                                set_={'version': RoleVersion.version + 1})
+    rows = await db.execute(statement.returning(RoleVersion.user_id, RoleVersion.version))
+    return dict(rows.all())
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from slugify import slugify
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker, create_schema
+from app.backend.recommendations import refresh_related, shutdown_related_pool, np
+from app.backend.supplier_stats import refresh_supplier_stats
+from app.models import User, Category, Product, Review
+from app.routers.auth import bcrypt_context
+
+SEED_BATCH_SIZE = 5000
+SEED_PASSWORD = 'password'
+
+WORDS = ['phone', 'case', 'black', 'white', 'wireless', 'charger', 'cable', 'fast', 'pro', 'mini',
+         'smart', 'watch', 'laptop', 'stand', 'glass', 'screen', 'audio', 'usb', 'power', 'bank']
+
+
+async def bulk_insert(db: AsyncSession, model, rows: list[dict]) -> list[int]:
+    # Многострочный insert пачками, id возвращаются в порядке строк
+    ids = []
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        result = await db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True),
+                                  rows[start:start + SEED_BATCH_SIZE])
+        ids.extend(result.all())
+    return ids
+
+
+def user_rows(prefix: str, count: int, hashed_password: str, **roles) -> list[dict]:
+    return [{'first_name': prefix.title(), 'last_name': str(number), 'username': f'{prefix}{number}',
+             'email': f'{prefix}{number}@example.com', 'hashed_password': hashed_password, **roles}
+            for number in range(1, count + 1)]
+
+
+async def seed_users(db: AsyncSession, customers: int, suppliers: int) -> tuple[list[int], list[int]]:
+    # bcrypt медленный, поэтому у всех пользователей один хэш
+    hashed_password = bcrypt_context.hash(SEED_PASSWORD)
+    await bulk_insert(db, User, user_rows('admin', 1, hashed_password,
+                                          is_admin=True, is_supplier=False, is_customer=False))
+    supplier_ids = await bulk_insert(db, User, user_rows('supplier', suppliers, hashed_password,
+                                                         is_supplier=True, is_customer=False))
+    customer_ids = await bulk_insert(db, User, user_rows('customer', customers, hashed_password,
+                                                         is_supplier=False, is_customer=True))
+    return supplier_ids, customer_ids
+
+
+async def seed_categories(db: AsyncSession, count: int) -> list[int]:
+    roots = max(1, count // 5)
+    root_ids = await bulk_insert(db, Category, [{'name': f'Category {number}', 'slug': f'category-{number}'}
+                                                for number in range(1, roots + 1)])
+    child_ids = await bulk_insert(db, Category, [
+        {'name': f'Category {number}', 'slug': f'category-{number}', 'parent_id': random.choice(root_ids)}
+        for number in range(roots + 1, count + 1)])
+    return root_ids + child_ids
+
+
+async def seed_products(db: AsyncSession, count: int, category_ids: list[int], supplier_ids: list[int]) -> list[int]:
+    rows = []
+    for number in range(1, count + 1):
+        name = ' '.join(random.choices(WORDS, k=3)).title()
+        rows.append({'name': name, 'slug': f'{slugify(name)}-{number}',
+                     'description': ' '.join(random.choices(WORDS, k=20)),
+                     'price': random.randint(100, 100000), 'image_url': f'/products/{number}.jpg',
+                     'stock': random.randint(0, 500), 'supplier_id': random.choice(supplier_ids),
+                     'category_id': random.choice(category_ids), 'rating': 0.0})
+    return await bulk_insert(db, Product, rows)
+
+
+async def seed_reviews(db: AsyncSession, count: int, product_ids: list[int], customer_ids: list[int]):
+    count = min(count, len(product_ids) * len(customer_ids))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((random.choice(customer_ids), random.choice(product_ids)))
+
+    now = datetime.now()
+    grades = defaultdict(list)
+    rows = []
+    for user_id, product_id in pairs:
+        grade = random.randint(1, 5)
+        grades[product_id].append(grade)
+        rows.append({'user_id': user_id, 'product_id': product_id, 'comment': ' '.join(random.choices(WORDS, k=8)),
+                     'comment_date': now - timedelta(minutes=random.randint(0, 60 * 24 * 60)), 'grade': grade})
+    await bulk_insert(db, Review, rows)
+
+    ratings = [{'id': product_id, 'rating': sum(values) / len(values)} for product_id, values in grades.items()]
+    for start in range(0, len(ratings), SEED_BATCH_SIZE):
+        await db.execute(update(Product), ratings[start:start + SEED_BATCH_SIZE])
+
+
+async def seed_catalog(db: AsyncSession, customers: int = 1000, suppliers: int = 50, categories: int = 30,
+                       products: int = 10000, reviews: int = 50000, seed: int = 0) -> dict:
+    random.seed(seed)
+    supplier_ids, customer_ids = await seed_users(db, customers, suppliers)
+    category_ids = await seed_categories(db, categories)
+    product_ids = await seed_products(db, products, category_ids, supplier_ids)
+    await seed_reviews(db, reviews, product_ids, customer_ids)
+    for supplier_id in supplier_ids:
+        await refresh_supplier_stats(db, supplier_id)
+    await db.commit()
+    if np is not None:
+        await refresh_related(db)
+
+    return {
+        'users': 1 + len(supplier_ids) + len(customer_ids),
+        'categories': len(category_ids),
+        'products': len(product_ids),
+        'reviews': min(reviews, len(product_ids) * len(customer_ids)),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--categories', type=int, default=30)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--create-schema', action='store_true')
+    args = parser.parse_args()
+
+    if args.create_schema:
+        await create_schema()
+    async with async_session_maker() as session:
+        counts = await seed_catalog(session, args.customers, args.suppliers, args.categories,
+                                    args.products, args.reviews)
+    shutdown_related_pool()
+    print(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
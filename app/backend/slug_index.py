@@ -0,0 +1,89 @@
+import sys
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker
+from app.models import Product, Category
+
+
+class SlugIndex:
+    def __init__(self, model):
+        self.model = model
+        self._ids: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, slug: str):
+        return slug in self._ids
+
+    def get(self, slug: str) -> int | None:
+        return self._ids.get(slug)
+
+    def add(self, slug: str, item_id: int):
+        self._ids[sys.intern(slug)] = item_id
+
+    def discard(self, slug: str):
+        self._ids.pop(slug, None)
+
+    def rename(self, old_slug: str, new_slug: str, item_id: int):
+        if self._ids.get(old_slug) == item_id:
+            del self._ids[old_slug]
+        self.add(new_slug, item_id)
+
+    async def load(self, db: AsyncSession):
+        rows = await db.execute(select(self.model.slug, self.model.id).where(self.model.slug.is_not(None)))
+        self._ids = {sys.intern(slug): item_id for slug, item_id in rows}
+
+    async def fetch(self, db: AsyncSession, slug: str):
+        # Индекс у каждого воркера свой и может отставать: после переименования или
+        # повторного использования slug в другом воркере запись указывает на чужую строку
+        item_id = self._ids.get(slug)
+        if item_id is not None:
+            row = await db.get(self.model, item_id)
+            if row is not None and row.slug == slug:
+                return row
+            self.discard(slug)
+        row = await db.scalar(select(self.model).where(self.model.slug == slug))
+        if row is not None:
+            self.add(slug, row.id)
+        return row
+
+    async def resolve(self, db: AsyncSession, slug: str) -> int | None:
+        row = await self.fetch(db, slug)
+        return row.id if row is not None else None
+
+    async def unique_slug(self, db: AsyncSession, base_slug: str, item_id: int | None = None) -> str:
+        slug, suffix = base_slug, 1
+        while True:
+            owner_id = await self.resolve(db, slug)
+            if owner_id is None or owner_id == item_id:
+                return slug
+            suffix += 1
+            slug = f'{base_slug}-{suffix}'
+
+    async def claim(self, db: AsyncSession, base_slug: str, write, item_id: int | None = None):
+        # Проверка свободного slug и запись не атомарны: если параллельный запрос успел занять slug,
+        # запись откатывается до savepoint и повторяется со следующим свободным суффиксом
+        slug = await self.unique_slug(db, base_slug, item_id)
+        while True:
+            try:
+                async with db.begin_nested():
+                    result = await write(slug)
+                return slug, result
+            except IntegrityError:
+                retry_slug = await self.unique_slug(db, base_slug, item_id)
+                if retry_slug == slug:
+                    raise
+                slug = retry_slug
+
+product_slugs = SlugIndex(Product)
+category_slugs = SlugIndex(Category)
+
+
+async def load_slug_indexes():
+    async with async_session_maker() as session:
+        await product_slugs.load(session)
+        await category_slugs.load(session)
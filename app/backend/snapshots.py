@@ -0,0 +1,73 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.compression import choose_encoding
+from app.models import Product, Category, CatalogSnapshot
+
+SNAPSHOT_MAX_AGE = timedelta(seconds=int(os.getenv('SNAPSHOT_MAX_AGE_SECONDS', 300)))
+SNAPSHOT_COMPRESS_LEVEL = int(os.getenv('SNAPSHOT_COMPRESS_LEVEL', 6))
+
+
+async def invalidate_snapshots(db: AsyncSession, *category_ids: int | None):
+    # Выполняется в транзакции вызывающего кода; родитель тоже сбрасывается,
+    # потому что его листинг включает товары подкатегорий
+    ids = {category_id for category_id in category_ids if category_id is not None}
+    if not ids:
+        return
+    parents = await db.scalars(select(Category.parent_id).where(Category.id.in_(ids),
+                                                                Category.parent_id.is_not(None)))
+    ids.update(parents.all())
+    await db.execute(delete(CatalogSnapshot).where(CatalogSnapshot.category_id.in_(ids)))
+
+
+async def build_snapshot(db: AsyncSession, category_id: int) -> CatalogSnapshot:
+    subcategories = select(Category.id).where(Category.parent_id == category_id)
+    products = await db.scalars(
+        select(Product).where(or_(Product.category_id == category_id, Product.category_id.in_(subcategories)),
+                              Product.is_active == True, Product.stock > 0))
+
+    body = json.dumps(jsonable_encoder(products.all()), ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+    snapshot = CatalogSnapshot(category_id=category_id,
+                               payload=gzip.compress(body, SNAPSHOT_COMPRESS_LEVEL),
+                               etag=hashlib.sha1(body).hexdigest(),
+                               built_at=datetime.now())
+    try:
+        await db.merge(snapshot)
+        await db.commit()
+    except IntegrityError:
+        # Параллельный запрос уже сохранил снимок этой категории
+        await db.rollback()
+    return snapshot
+
+
+async def get_snapshot(db: AsyncSession, category_id: int) -> CatalogSnapshot:
+    snapshot = await db.get(CatalogSnapshot, category_id)
+    if snapshot is None or snapshot.built_at < datetime.now() - SNAPSHOT_MAX_AGE:
+        snapshot = await build_snapshot(db, category_id)
+    return snapshot
+
+
+def snapshot_response(request: Request, snapshot: CatalogSnapshot) -> Response:
+    headers = {
+        'ETag': f'"{snapshot.etag}"',
+        'Vary': 'Accept-Encoding',
+        # Снимок сбрасывается при записи, поэтому клиенты и CDN всегда перепроверяют его по ETag
+        'Cache-Control': 'public, no-cache',
+    }
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=304, headers=headers)
+
+    if choose_encoding(request.headers.get('accept-encoding', ''), ('gzip',)) == 'gzip':
+        headers['Content-Encoding'] = 'gzip'
+        return Response(snapshot.payload, media_type='application/json', headers=headers)
+    return Response(gzip.decompress(snapshot.payload), media_type='application/json', headers=headers)
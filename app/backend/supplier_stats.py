@@ -0,0 +1,109 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import dialect_insert
+from app.models import Product, Review, SupplierStats, SupplierReviewDay
+
+VELOCITY_WINDOWS = (7, 30)
+
+
+async def track_products(db: AsyncSession, supplier_id: int | None, products: int = 0, stock: int = 0):
+    # Только инкремент существующей строки: если сводки ещё нет,
+    # она будет полностью посчитана при первом чтении
+    if supplier_id is None or not (products or stock):
+        return
+    await db.execute(update(SupplierStats).where(SupplierStats.supplier_id == supplier_id).values(
+        product_count=SupplierStats.product_count + products,
+        stock_total=SupplierStats.stock_total + stock))
+
+
+async def track_review(db: AsyncSession, supplier_id: int | None, grade: int, delta: int = 1):
+    if supplier_id is None:
+        return
+    grade_column = getattr(SupplierStats, f'grade_{grade}')
+    await db.execute(update(SupplierStats).where(SupplierStats.supplier_id == supplier_id).values(
+        {SupplierStats.review_count: SupplierStats.review_count + delta,
+         grade_column: grade_column + delta}))
+
+
+async def track_review_day(db: AsyncSession, supplier_id: int | None, day: date):
+    # day берётся из comment_date отзыва — по нему же группирует refresh_supplier_stats
+    if supplier_id is None:
+        return
+    insert = dialect_insert(db)
+    statement = insert(SupplierReviewDay).values(supplier_id=supplier_id, day=day, review_count=1)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[SupplierReviewDay.supplier_id, SupplierReviewDay.day],
+        set_={'review_count': SupplierReviewDay.review_count + statement.excluded.review_count}))
+
+
+async def refresh_supplier_stats(db: AsyncSession, supplier_id: int) -> SupplierStats:
+    product_count, stock_total = (await db.execute(
+        select(func.count(Product.id), func.coalesce(func.sum(Product.stock), 0)).where(
+            Product.supplier_id == supplier_id, Product.is_active == True))).one()
+
+    grades = dict((await db.execute(
+        select(Review.grade, func.count(Review.id)).join(Product).where(
+            Product.supplier_id == supplier_id, Review.is_active == True).group_by(Review.grade))).all())
+
+    since = date.today() - timedelta(days=max(VELOCITY_WINDOWS) - 1)
+    review_day = func.date(Review.comment_date)
+    days = (await db.execute(
+        select(review_day, func.count(Review.id)).join(Product).where(
+            Product.supplier_id == supplier_id, Review.comment_date >= since).group_by(review_day))).all()
+
+    # Upsert вместо delete + insert: параллельный пересчёт или новый отзыв не приводят к конфликту ключа
+    insert = dialect_insert(db)
+    days = {day if isinstance(day, date) else date.fromisoformat(day): count for day, count in days}
+    if days:
+        statement = insert(SupplierReviewDay).values([
+            {'supplier_id': supplier_id, 'day': day, 'review_count': count} for day, count in days.items()])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[SupplierReviewDay.supplier_id, SupplierReviewDay.day],
+            set_={'review_count': statement.excluded.review_count}))
+    await db.execute(delete(SupplierReviewDay).where(SupplierReviewDay.supplier_id == supplier_id,
+                                                     SupplierReviewDay.day >= since,
+                                                     SupplierReviewDay.day.not_in(list(days))))
+
+    values = {'supplier_id': supplier_id,
+              'product_count': product_count,
+              'stock_total': stock_total,
+              'review_count': sum(grades.values()),
+              'refreshed_at': datetime.now(),
+              **{f'grade_{grade}': grades.get(grade, 0) for grade in range(1, 6)}}
+    statement = insert(SupplierStats).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[SupplierStats.supplier_id],
+        set_={name: statement.excluded[name] for name in values if name != 'supplier_id'})
+    stats = await db.scalar(statement.returning(SupplierStats), execution_options={'populate_existing': True})
+    await db.commit()
+    return stats
+
+
+async def get_supplier_stats(db: AsyncSession, supplier_id: int) -> dict:
+    stats = await db.get(SupplierStats, supplier_id)
+    if stats is None:
+        stats = await refresh_supplier_stats(db, supplier_id)
+
+    today = date.today()
+    velocity = {}
+    for window in VELOCITY_WINDOWS:
+        velocity[f'reviews_last_{window}_days'] = await db.scalar(
+            select(func.coalesce(func.sum(SupplierReviewDay.review_count), 0)).where(
+                SupplierReviewDay.supplier_id == supplier_id,
+                SupplierReviewDay.day > today - timedelta(days=window)))
+
+    distribution = {str(grade): getattr(stats, f'grade_{grade}') for grade in range(1, 6)}
+    total_grade = sum(grade * count for grade, count in enumerate(distribution.values(), start=1))
+    return {
+        'supplier_id': supplier_id,
+        'product_count': stats.product_count,
+        'stock_total': stats.stock_total,
+        'review_count': stats.review_count,
+        'average_rating': total_grade / stats.review_count if stats.review_count else 0.0,
+        'rating_distribution': distribution,
+        **velocity,
+        'refreshed_at': stats.refreshed_at,
+    }
@@ -0,0 +1,73 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self.endpoint_finished: float | None = None
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        metrics = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.durations.items()]
+        metrics.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def timing(name: str):
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def timed_endpoint(endpoint):
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with timing('endpoint'):
+            result = await endpoint(*args, **kwargs)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.endpoint_finished = time.perf_counter()
+        return result
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    # Время от возврата из обработчика до готового Response — это валидация и сериализация ответа
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = request_timings.get()
+            if timings is not None and timings.endpoint_finished is not None:
+                timings.add('serialize', time.perf_counter() - timings.endpoint_finished)
+                timings.endpoint_finished = None
+            return response
+
+        return timed_handler
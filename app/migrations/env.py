@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 from app.backend.db import Base
-from app.models import categories, products, user
+from app.models import categories, products, user, review, snapshot, supplier_stats, change, related, role_version, archive
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
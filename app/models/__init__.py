@@ -1,4 +1,10 @@
 from .user import User
 from .categories import Category
 from .products import Product
-from .review import Review
\ No newline at end of file
+from .review import Review
+from .snapshot import CatalogSnapshot
+from .supplier_stats import SupplierStats, SupplierReviewDay
+from .change import Change
+from .related import RelatedProducts
+from .role_version import RoleVersion
+from .archive import archive_tables
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Table
+
+from app.backend.db import Base
+from app.models.categories import Category
+from app.models.products import Product
+from app.models.review import Review
+from app.models.user import User
+
+
+def archive_table(model) -> Table:
+    columns = [Column(column.name, column.type, primary_key=column.primary_key)
+               for column in model.__table__.columns]
+    return Table(f'{model.__tablename__}_archive', Base.metadata,
+                 *columns,
+                 Column('archived_at', DateTime, nullable=False, index=True))
+
+
+archive_tables = {model: archive_table(model) for model in (Review, Product, Category, User)}
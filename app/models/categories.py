@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Column, Boolean, String, ForeignKey
+from sqlalchemy import Integer, Column, Boolean, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -12,6 +12,7 @@ class Category(Base):
     name = Column(String)
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
     parent_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
 
     products = relationship('Product', back_populates='category')
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.backend.db import Base
+
+
+class Change(Base):
+    __tablename__ = 'changes'
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)
+    slug = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
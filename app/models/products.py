@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -17,4 +17,6 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey('categories.id'))
     rating = Column(Float)
     is_active = Column(Boolean, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
     category = relationship('Category', back_populates='products')
+    reviews = relationship('Review', back_populates='product')
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, JSON
+
+from app.backend.db import Base
+
+
+class RelatedProducts(Base):
+    __tablename__ = 'related_products'
+
+    product_id = Column(Integer, primary_key=True)
+    related_ids = Column(JSON, nullable=False, default=list)
+    is_stale = Column(Boolean, nullable=False, default=False, index=True)
+    stale_version = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=True)
@@ -14,6 +14,7 @@ class Review(Base):
     comment_date = Column(DateTime, nullable=False)
     grade = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
 
     user = relationship('User', back_populates='reviews')
     product = relationship('Product', back_populates='reviews')
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer
+
+from app.backend.db import Base
+
+
+class RoleVersion(Base):
+    __tablename__ = 'role_versions'
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+
+from app.backend.db import Base
+
+
+class CatalogSnapshot(Base):
+    __tablename__ = 'catalog_snapshots'
+
+    category_id = Column(Integer, primary_key=True)
+    payload = Column(LargeBinary, nullable=False)
+    etag = Column(String, nullable=False)
+    built_at = Column(DateTime, nullable=False)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Date, DateTime
+
+from app.backend.db import Base
+
+
+class SupplierStats(Base):
+    __tablename__ = 'supplier_stats'
+
+    supplier_id = Column(Integer, primary_key=True)
+    product_count = Column(Integer, nullable=False, default=0)
+    stock_total = Column(Integer, nullable=False, default=0)
+    review_count = Column(Integer, nullable=False, default=0)
+    grade_1 = Column(Integer, nullable=False, default=0)
+    grade_2 = Column(Integer, nullable=False, default=0)
+    grade_3 = Column(Integer, nullable=False, default=0)
+    grade_4 = Column(Integer, nullable=False, default=0)
+    grade_5 = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False)
+
+
+class SupplierReviewDay(Base):
+    __tablename__ = 'supplier_review_days'
+
+    supplier_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,66 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.archive import run_archival, table_stats, restore, RestoreError
+from app.backend.db_depends import get_db
+from app.backend.timing import TimedRoute
+from app.models import Product, Category, Review, User
+from app.routers.auth import get_current_user
+
+router = APIRouter(prefix='/archive', tags=['archive'], route_class=TimedRoute)
+
+restorable = {model.__tablename__: model for model in (Product, Category, Review, User)}
+
+
+def check_admin(get_user: dict):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be admin user for this"
+        )
+
+
+@router.get('/stats')
+async def archive_stats(db: Annotated[AsyncSession, Depends(get_db)],
+                        get_user: Annotated[dict, Depends(get_current_user)]):
+    check_admin(get_user)
+    return await table_stats(db)
+
+
+@router.post('/run')
+async def archive_run(get_user: Annotated[dict, Depends(get_current_user)]):
+    check_admin(get_user)
+    return await run_archival()
+
+
+@router.post('/restore/{table}/{item_id}')
+async def archive_restore(db: Annotated[AsyncSession, Depends(get_db)], table: str, item_id: int,
+                          get_user: Annotated[dict, Depends(get_current_user)]):
+    check_admin(get_user)
+    model = restorable.get(table)
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Table {table} can not be restored'
+        )
+
+    try:
+        item = await restore(db, model, item_id)
+    except RestoreError as error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(error)
+        )
+    if item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'There is no row {item_id} in {table}'
+        )
+
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Restore is successful',
+    }
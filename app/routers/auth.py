@@ -11,26 +11,30 @@ from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backend.db_depends import get_db
+from app.backend.role_versions import role_versions
+from app.backend.timing import TimedRoute, timing
 from app.models.user import User
+from app.models.role_version import RoleVersion
 from app.schemas import CreateUser
 
 load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(prefix='/auth', tags=['auth'], route_class=TimedRoute)
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
 async def create_access_token(username: str, user_id: int, is_admin: bool, is_supplier: bool, is_customer: bool,
-                              expires_delta: timedelta = timedelta(minutes=15)):
+                              expires_delta: timedelta = timedelta(minutes=15), role_version: int = 0):
     payload = {
         'sub': username,
         'id': user_id,
         'is_admin': is_admin,
         'is_supplier': is_supplier,
         'is_customer': is_customer,
+        'rv': role_version,
         'exp': int((datetime.now(timezone.utc) + expires_delta).timestamp()),
     }
 
@@ -39,13 +43,15 @@ async def create_access_token(username: str, user_id: int, is_admin: bool, is_su
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timing('auth'):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str | None = payload.get('sub')
         user_id: int | None = payload.get('id')
         is_admin: bool | None = payload.get('is_admin')
         is_supplier: bool | None = payload.get('is_supplier')
         is_customer: bool | None = payload.get('is_customer')
         expire: int | None = payload.get('exp')
+        role_version: int = payload.get('rv', 0)
 
         if username is None or user_id is None:
             raise HTTPException(
@@ -73,6 +79,13 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
                 detail="Token expired!"
             )
 
+        # Роли пользователя менялись после выдачи токена
+        if role_version < await role_versions.current(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='User roles have changed, please log in again'
+            )
+
         return {
             'username': username,
             'id': user_id,
@@ -85,7 +98,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired!"
         )
-    except jwt.exceptions:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Could not validate user'
@@ -121,8 +134,9 @@ async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], userna
 @router.post('/token')
 async def login(db: Annotated[AsyncSession, Depends(get_db)], form_data: OAuth2PasswordRequestForm = Depends()):
     user = await authenticate_user(db, form_data.username, form_data.password)
+    role_version = await db.scalar(select(RoleVersion.version).where(RoleVersion.user_id == user.id))
     token = await create_access_token(user.username, user.id, user.is_admin, user.is_supplier, user.is_customer,
-                                      expires_delta=timedelta(minutes=20))
+                                      expires_delta=timedelta(minutes=20), role_version=role_version or 0)
 
     return {
         'access_token': token,
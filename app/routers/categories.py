@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import APIRouter, status, Depends, HTTPException
@@ -5,12 +6,16 @@ from slugify import slugify
 from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.changes import record_change
 from app.backend.db_depends import get_db
+from app.backend.slug_index import category_slugs
+from app.backend.snapshots import invalidate_snapshots
+from app.backend.timing import TimedRoute
 from app.models.categories import Category
 from app.routers.auth import get_current_user
 from app.schemas import CreateCategory
 
-router = APIRouter(prefix='/categories', tags=['category'])
+router = APIRouter(prefix='/categories', tags=['category'], route_class=TimedRoute)
 
 
 @router.get('/')
@@ -27,10 +32,16 @@ async def create_category(db: Annotated[AsyncSession, Depends(get_db)], create_c
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You must be admin user for this"
         )
-    await db.execute(insert(Category).values(name=create_category.name,
-                                             parent_id=create_category.parent_id,
-                                             slug=slugify(create_category.name)))
+
+    async def insert_category(slug: str):
+        return await db.scalar(insert(Category).values(name=create_category.name,
+                                                       parent_id=create_category.parent_id,
+                                                       slug=slug).returning(Category.id))
+
+    slug, category_id = await category_slugs.claim(db, slugify(create_category.name), insert_category)
+    await record_change(db, 'category', category_id, 'create', slug)
     await db.commit()
+    category_slugs.add(slug, category_id)
     return {
         'status_code': status.HTTP_201_CREATED,
         'transaction': 'Successfully created category',
@@ -46,18 +57,26 @@ async def update_category(db: Annotated[AsyncSession, Depends(get_db)], category
             detail="You must be admin user for this"
         )
 
-    category = await db.scalar(select(Category).where(Category.slug == category_slug))
+    category = await category_slugs.fetch(db, category_slug)
     if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Category {category_slug} not found'
         )
 
-    category.name = update_category.name,
-    category.slug = slugify(update_category.name)
+    old_slug = category.slug
+    await invalidate_snapshots(db, category.id, category.parent_id, update_category.parent_id)
+    category.name = update_category.name
     category.parent_id = update_category.parent_id
 
+    async def rename_category(slug: str):
+        category.slug = slug
+
+    await category_slugs.claim(db, slugify(update_category.name), rename_category, category.id)
+    await record_change(db, 'category', category.id, 'update', category.slug)
+
     await db.commit()
+    category_slugs.rename(old_slug, category.slug, category.id)
 
     return {
         'status_code': status.HTTP_200_OK,
@@ -74,14 +93,17 @@ async def delete_category(db: Annotated[AsyncSession, Depends(get_db)], category
             detail="You must be admin user for this"
         )
 
-    category = await db.scalar(select(Category).where(Category.slug == category_slug, Category.is_active == True))
-    if category is None:
+    category = await category_slugs.fetch(db, category_slug)
+    if category is None or not category.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Category {category_slug} not found'
         )
 
     category.is_active = False
+    category.deactivated_at = datetime.now()
+    await invalidate_snapshots(db, category.id)
+    await record_change(db, 'category', category.id, 'delete', category.slug)
 
     await db.commit()
 
@@ -0,0 +1,50 @@
+import json
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.changes import changes_since, wait_for_changes, CHANGES_PAGE_SIZE
+from app.backend.db import async_session_maker
+from app.backend.db_depends import get_db
+from app.backend.timing import TimedRoute
+
+router = APIRouter(prefix='/changes', tags=['changes'], route_class=TimedRoute)
+
+
+@router.get('/')
+async def get_changes(db: Annotated[AsyncSession, Depends(get_db)], since: int = 0,
+                      limit: Annotated[int, Query(ge=1, le=CHANGES_PAGE_SIZE)] = 100):
+    changes = await changes_since(db, since, limit)
+
+    return {
+        'changes': changes,
+        'last_seq': changes[-1].seq if changes else since,
+        'has_more': len(changes) == limit,
+    }
+
+
+@router.get('/stream')
+async def stream_changes(request: Request, since: int = 0):
+    last_event_id = request.headers.get('last-event-id')
+    if last_event_id is not None and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        last_seq = since
+        yield ': connected\n\n'
+        while not await request.is_disconnected():
+            async with async_session_maker() as session:
+                changes = await changes_since(session, last_seq)
+            for change in changes:
+                last_seq = change.seq
+                yield f'id: {change.seq}\nevent: change\ndata: {json.dumps(jsonable_encoder(change))}\n\n'
+            if len(changes) < CHANGES_PAGE_SIZE:
+                await wait_for_changes()
+                if not changes:
+                    yield ': keep-alive\n\n'
+
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select, update
@@ -6,11 +7,14 @@ from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backend.db_depends import get_db
+from app.backend.role_versions import role_versions, bump_role_versions
+from app.backend.timing import TimedRoute
 from app.models.user import User
+from app.schemas import UpdateRoles
 from .auth import get_current_user
 
 
-router = APIRouter(prefix='/permission', tags=['permission'])
+router = APIRouter(prefix='/permission', tags=['permission'], route_class=TimedRoute)
 
 
 @router.patch('/')
@@ -26,14 +30,18 @@ async def supplier_permission(db: Annotated[AsyncSession, Depends(get_db)], get_
             )
         if user.is_supplier:
             await db.execute(update(User).where(User.id == user_id).values(is_supplier=False, is_customer=True))
+            versions = await bump_role_versions(db, [user_id])
             await db.commit()
+            role_versions.update(versions)
             return {
                 'status_code': status.HTTP_200_OK,
                 'detail': 'User is no longer supplier'
             }
         else:
             await db.execute(update(User).where(User.id == user_id).values(is_supplier=True, is_customer=False))
+            versions = await bump_role_versions(db, [user_id])
             await db.commit()
+            role_versions.update(versions)
             return {
                 'status_code': status.HTTP_200_OK,
                 'detail': 'User is now supplier'
@@ -45,6 +53,35 @@ async def supplier_permission(db: Annotated[AsyncSession, Depends(get_db)], get_
         )
 
 
+@router.patch('/bulk')
+async def bulk_permission(db: Annotated[AsyncSession, Depends(get_db)], get_user: Annotated[dict, Depends(get_current_user)],
+                          update_roles_model: UpdateRoles):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have admin permission"
+        )
+
+    # Пользователи, у которых роль уже нужная, не обновляются, и их токены остаются действительными
+    user_ids = sorted(set(update_roles_model.user_ids))
+    updated = await db.scalars(update(User)
+                               .where(User.id.in_(user_ids), User.is_active == True, User.is_admin == False,
+                                      User.is_supplier != update_roles_model.is_supplier)
+                               .values(is_supplier=update_roles_model.is_supplier,
+                                       is_customer=not update_roles_model.is_supplier)
+                               .returning(User.id))
+    updated_ids = sorted(updated.all())
+    versions = await bump_role_versions(db, updated_ids)
+    await db.commit()
+    role_versions.update(versions)
+
+    return {
+        'status_code': status.HTTP_200_OK,
+        'updated': updated_ids,
+        'skipped': sorted(set(user_ids) - set(updated_ids)),
+    }
+
+
 @router.delete('/delete')
 async def delete_user(db: Annotated[AsyncSession, Depends(get_db)], get_user: Annotated[dict, Depends(get_current_user)], user_id: int):
     if get_user.get('is_admin'):
@@ -63,8 +100,10 @@ async def delete_user(db: Annotated[AsyncSession, Depends(get_db)], get_user: An
             )
 
         if user.is_active:
-            await db.execute(update(User).where(User.id == user_id).values(is_active=False))
+            await db.execute(update(User).where(User.id == user_id).values(is_active=False, deactivated_at=datetime.now()))
+            versions = await bump_role_versions(db, [user_id])
             await db.commit()
+            role_versions.update(versions)
             return {
                 'status_code': status.HTTP_200_OK,
                 'detail': 'User is deleted'
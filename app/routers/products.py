@@ -1,17 +1,26 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi import status
+from fastapi.encoders import jsonable_encoder
 from slugify import slugify
 from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.changes import record_change
 from app.backend.db_depends import get_db
+from app.backend import images
+from app.backend.recommendations import related_products
+from app.backend.slug_index import product_slugs, category_slugs
+from app.backend.snapshots import get_snapshot, invalidate_snapshots, snapshot_response
+from app.backend.supplier_stats import track_products
+from app.backend.timing import TimedRoute
 from app.models import Product, Category
 from app.routers.auth import get_current_user
 from app.schemas import CreateProduct
 
-router = APIRouter(prefix='/products', tags=['products'])
+router = APIRouter(prefix='/products', tags=['products'], route_class=TimedRoute)
 
 
 @router.get('/')
@@ -44,16 +53,23 @@ async def create_product(db: Annotated[AsyncSession, Depends(get_db)], product:
             detail='There is no category found'
         )
 
-    await db.execute(insert(Product).values(name=product.name,
-                                            description=product.description,
-                                            price=product.price,
-                                            image_url=product.image_url,
-                                            stock=product.stock,
-                                            supplier_id=get_user.get('id'),
-                                            category_id=product.category,
-                                            rating=0.0,
-                                            slug=slugify(product.name)))
+    async def insert_product(slug: str):
+        return await db.scalar(insert(Product).values(name=product.name,
+                                                      description=product.description,
+                                                      price=product.price,
+                                                      image_url=product.image_url,
+                                                      stock=product.stock,
+                                                      supplier_id=get_user.get('id'),
+                                                      category_id=product.category,
+                                                      rating=0.0,
+                                                      slug=slug).returning(Product.id))
+
+    slug, product_id = await product_slugs.claim(db, slugify(product.name), insert_product)
+    await invalidate_snapshots(db, product.category)
+    await track_products(db, get_user.get('id'), products=1, stock=product.stock)
+    await record_change(db, 'product', product_id, 'create', slug)
     await db.commit()
+    product_slugs.add(slug, product_id)
 
     return {
         'status_code': status.HTTP_201_CREATED,
@@ -62,33 +78,68 @@ async def create_product(db: Annotated[AsyncSession, Depends(get_db)], product:
 
 
 @router.get('/{category_slug}')
-async def product_by_category(db: Annotated[AsyncSession, Depends(get_db)], category_slug: str):
-    category = await db.scalar(select(Category).where(Category.slug == category_slug))
-    if category is None:
+async def product_by_category(db: Annotated[AsyncSession, Depends(get_db)], request: Request, category_slug: str):
+    category_id = await category_slugs.resolve(db, category_slug)
+    if category_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Category not found'
         )
-    subcategories = await db.scalars(select(Category).where(Category.parent_id == category.id))
-    products = await db.scalars(
-        select(Product).filter(Product.category_id.in_([category.id] + [s.id for s in subcategories.all()])).where(
-            Product.is_active == True, Product.stock > 0))
 
-    return products.all()
+    return snapshot_response(request, await get_snapshot(db, category_id))
 
 
 @router.get('/detail/{product_slug}')
 async def product_detail(db: Annotated[AsyncSession, Depends(get_db)], product_slug: str):
-    product = await db.scalar(select(Product).where(Product.slug == product_slug,
-                                                    Product.is_active == True,
-                                                    Product.stock > 0))
-    if product is None:
+    product = await product_slugs.fetch(db, product_slug)
+    if product is None or not product.is_active or product.stock <= 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There is no product found'
         )
 
-    return product
+    related = await related_products(db, product.id)
+    return {
+        **jsonable_encoder(product),
+        'related': [{'id': item.id, 'name': item.name, 'slug': item.slug, 'price': item.price,
+                     'image_url': item.image_url, 'rating': item.rating} for item in related],
+    }
+
+
+@router.get('/images/{product_slug}')
+async def product_image(db: Annotated[AsyncSession, Depends(get_db)], request: Request, product_slug: str,
+                        width: int = 256, image_format: Annotated[str, Query(alias='format')] = 'webp'):
+    if width not in images.IMAGE_WIDTHS or image_format not in images.IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Width must be one of {images.IMAGE_WIDTHS} and format one of {list(images.IMAGE_FORMATS)}'
+        )
+    if images.Image is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail='Image processing is not available'
+        )
+
+    product = await product_slugs.fetch(db, product_slug)
+    source = images.original_path(product.image_url) if product is not None and product.is_active else None
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no product image found'
+        )
+    await db.release()
+
+    # ETag зависит только от содержимого оригинала, поэтому 304 отдаётся без построения производной
+    digest = await images.content_hash(source)
+    headers = {
+        'ETag': f'"{images.derivative_name(digest, width, image_format)}"',
+        'Cache-Control': 'public, max-age=2592000',
+    }
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    pin = await images.pin_derivative(source, digest, width, image_format)
+    return images.PinnedFileResponse(pin, media_type=images.IMAGE_FORMATS[image_format][1], headers=headers)
 
 
 @router.put('/{product_slug}')
@@ -96,22 +147,32 @@ async def update_product(db: Annotated[AsyncSession, Depends(get_db)], product_s
                          update_product_model: CreateProduct, get_user: Annotated[dict, Depends(get_current_user)]):
     renew_product = await get_product_only_for_admin_or_supplier(db, get_user, product_slug)
 
-    category = await db.scalar(select(Category).where(Category.id == update_product_model.category))
+    category = await db.get(Category, update_product_model.category)
     if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There is no category found'
         )
 
-    renew_product.name = update_product_model.name,
-    renew_product.description = update_product_model.description,
-    renew_product.price = update_product_model.price,
-    renew_product.image_url = update_product_model.image_url,
-    renew_product.stock = update_product_model.stock,
-    renew_product.category_id = update_product_model.category,
-    renew_product.slug = slugify(update_product_model.name)
+    old_slug = renew_product.slug
+    await invalidate_snapshots(db, renew_product.category_id, update_product_model.category)
+    if renew_product.is_active:
+        await track_products(db, renew_product.supplier_id, stock=update_product_model.stock - renew_product.stock)
+    renew_product.name = update_product_model.name
+    renew_product.description = update_product_model.description
+    renew_product.price = update_product_model.price
+    renew_product.image_url = update_product_model.image_url
+    renew_product.stock = update_product_model.stock
+    renew_product.category_id = update_product_model.category
+
+    async def rename_product(slug: str):
+        renew_product.slug = slug
+
+    await product_slugs.claim(db, slugify(update_product_model.name), rename_product, renew_product.id)
+    await record_change(db, 'product', renew_product.id, 'update', renew_product.slug)
 
     await db.commit()
+    product_slugs.rename(old_slug, renew_product.slug, renew_product.id)
 
     return {
         'status_code': status.HTTP_200_OK,
@@ -123,7 +184,12 @@ async def update_product(db: Annotated[AsyncSession, Depends(get_db)], product_s
 async def delete_product(db: Annotated[AsyncSession, Depends(get_db)], product_slug: str,
                          get_user: Annotated[dict, Depends(get_current_user)]):
     product = await get_product_only_for_admin_or_supplier(db, get_user, product_slug)
+    if product.is_active:
+        await track_products(db, product.supplier_id, products=-1, stock=-product.stock)
     product.is_active = False
+    product.deactivated_at = datetime.now()
+    await invalidate_snapshots(db, product.category_id)
+    await record_change(db, 'product', product.id, 'delete', product.slug)
     await db.commit()
 
     return {
@@ -141,7 +207,7 @@ async def get_product_only_for_admin_or_supplier(db: Annotated[AsyncSession, Dep
             detail='You are not authorized to use this method'
         )
 
-    target_product = await db.scalar(select(Product).where(Product.slug == product_slug))
+    target_product = await product_slugs.fetch(db, product_slug)
     if target_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,50 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+
+from app.backend import profiling
+from app.backend.timing import TimedRoute
+from app.routers.auth import get_current_user
+
+router = APIRouter(prefix='/profiling', tags=['profiling'], route_class=TimedRoute)
+
+
+def check_admin(get_user: dict):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be admin user for this"
+        )
+
+
+@router.post('/start')
+async def start_profiling(get_user: Annotated[dict, Depends(get_current_user)],
+                          seconds: Annotated[int, Query(ge=1, le=profiling.PROFILE_MAX_WINDOW)] = 30):
+    check_admin(get_user)
+    if profiling.window_profiler is not None and profiling.window_profiler.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Profiling is already running'
+        )
+
+    await profiling.profile_window(seconds)
+    return {
+        'status_code': status.HTTP_200_OK,
+        'detail': f'Profiling for {seconds} seconds',
+    }
+
+
+@router.get('/result', response_class=PlainTextResponse)
+async def profiling_result(get_user: Annotated[dict, Depends(get_current_user)]):
+    check_admin(get_user)
+    if profiling.window_profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no profile yet'
+        )
+
+    # Окно профилирует весь воркер, включая все параллельные запросы
+    return PlainTextResponse(profiling.window_profiler.folded(),
+                             headers={'X-Profile-Scope': profiling.window_profiler.scope})
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -5,12 +6,18 @@ from fastapi import status
 from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.changes import record_change
 from app.backend.db_depends import get_db
+from app.backend.recommendations import mark_related_stale
+from app.backend.slug_index import product_slugs
+from app.backend.snapshots import invalidate_snapshots
+from app.backend.supplier_stats import track_review, track_review_day
+from app.backend.timing import TimedRoute
 from app.models import Review, Product
 from app.routers.auth import get_current_user
 from app.schemas import CreateReview
 
-router = APIRouter(prefix='/reviews', tags=['reviews'])
+router = APIRouter(prefix='/reviews', tags=['reviews'], route_class=TimedRoute)
 
 
 @router.get('/')
@@ -28,9 +35,15 @@ async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
 
 @router.get('/{product_slug}')
 async def products_reviews(db: Annotated[AsyncSession, Depends(get_db)], product_slug: str):
+    product_id = await product_slugs.resolve(db, product_slug)
+    if product_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no product found'
+        )
     reviews = await db.scalars(select(Review).join(Product).where(Review.is_active == True,
                                                                   Product.is_active == True,
-                                                                  Product.slug == product_slug))
+                                                                  Review.product_id == product_id))
     if reviews is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,10 +61,11 @@ async def create_review(db: Annotated[AsyncSession, Depends(get_db)],
             status_code=status.HTTP_403_FORBIDDEN,
             detail='You are not authorized to use this method'
         )
-    await db.execute(insert(Review).values(user_id=get_user.get('id'),
-                                           product_id=create_review_model.product_id,
-                                           comment=create_review_model.comment,
-                                           grade=create_review_model.grade))
+    review_id = await db.scalar(insert(Review).values(user_id=get_user.get('id'),
+                                                      product_id=create_review_model.product_id,
+                                                      comment=create_review_model.comment,
+                                                      comment_date=create_review_model.comment_date,
+                                                      grade=create_review_model.grade).returning(Review.id))
 
     reviews = await db.scalars(
         select(Review).where(Review.is_active == True, Review.product_id == create_review_model.product_id))
@@ -72,6 +86,12 @@ async def create_review(db: Annotated[AsyncSession, Depends(get_db)],
         )
 
     update_product.rating = average_rating
+    await invalidate_snapshots(db, update_product.category_id)
+    await track_review(db, update_product.supplier_id, create_review_model.grade)
+    await track_review_day(db, update_product.supplier_id, create_review_model.comment_date.date())
+    await mark_related_stale(db, create_review_model.product_id, get_user.get('id'))
+    await record_change(db, 'review', review_id, 'create')
+    await record_change(db, 'product', update_product.id, 'update', update_product.slug)
     await db.commit()
 
     return {
@@ -80,7 +100,7 @@ async def create_review(db: Annotated[AsyncSession, Depends(get_db)],
     }
 
 
-@router.get('/')
+@router.delete('/')
 async def delete_reviews(db: Annotated[AsyncSession, Depends(get_db)], review_id: int,
                          get_user: Annotated[dict, Depends(get_current_user)]):
     if not get_user.get('is_admin'):
@@ -96,7 +116,12 @@ async def delete_reviews(db: Annotated[AsyncSession, Depends(get_db)], review_id
             detail='There is no review found'
         )
 
+    if target_review.is_active:
+        product = await db.get(Product, target_review.product_id)
+        await track_review(db, product.supplier_id, target_review.grade, delta=-1)
     target_review.is_active = False
+    target_review.deactivated_at = datetime.now()
+    await record_change(db, 'review', target_review.id, 'delete')
     await db.commit()
 
     return {
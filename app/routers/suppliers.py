@@ -0,0 +1,49 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db_depends import get_db
+from app.backend.supplier_stats import get_supplier_stats, refresh_supplier_stats
+from app.backend.timing import TimedRoute
+from app.routers.auth import get_current_user
+
+router = APIRouter(prefix='/suppliers', tags=['suppliers'], route_class=TimedRoute)
+
+
+@router.get('/stats')
+async def my_supplier_stats(db: Annotated[AsyncSession, Depends(get_db)],
+                            get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_supplier'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You must be supplier for this'
+        )
+
+    return await get_supplier_stats(db, get_user.get('id'))
+
+
+@router.get('/{supplier_id}/stats')
+async def supplier_stats(db: Annotated[AsyncSession, Depends(get_db)], supplier_id: int,
+                         get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be admin user for this"
+        )
+
+    return await get_supplier_stats(db, supplier_id)
+
+
+@router.post('/{supplier_id}/stats/refresh')
+async def refresh_stats(db: Annotated[AsyncSession, Depends(get_db)], supplier_id: int,
+                        get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be admin user for this"
+        )
+
+    await refresh_supplier_stats(db, supplier_id)
+    return await get_supplier_stats(db, supplier_id)
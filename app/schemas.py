@@ -30,3 +30,8 @@ class CreateReview(BaseModel):
     comment: str
     comment_date: datetime = Field(default_factory=datetime.now)
     grade: int = Field(..., ge=1, le=5)
+
+
+class UpdateRoles(BaseModel):
+    user_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    is_supplier: bool
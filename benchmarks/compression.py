@@ -0,0 +1,63 @@
+"""CPU cost vs bytes saved for every codec and level the compression middleware can use.
+
+Usage: python -m benchmarks.compression [--products 1000] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import time
+
+from app.backend.compression import available_encodings, compress
+
+LEVELS = {
+    'gzip': range(1, 10),
+    'br': range(0, 12),
+    'zstd': (1, 3, 6, 9, 12, 19),
+}
+
+
+def product_listing(count: int) -> bytes:
+    words = ['phone', 'case', 'black', 'white', 'wireless', 'charger', 'cable', 'fast', 'pro', 'mini']
+    products = []
+    for product_id in range(1, count + 1):
+        name = ' '.join(random.choices(words, k=3)).title()
+        products.append({
+            'id': product_id,
+            'name': name,
+            'slug': f"{name.lower().replace(' ', '-')}-{product_id}",
+            'description': ' '.join(random.choices(words, k=20)),
+            'price': random.randint(100, 100000),
+            'image_url': f'/images/products/{product_id}.jpg',
+            'stock': random.randint(0, 500),
+            'supplier_id': random.randint(1, 50),
+            'category_id': random.randint(1, 30),
+            'rating': round(random.uniform(0, 5), 2),
+            'is_active': True,
+            'deactivated_at': None,
+        })
+    return json.dumps(products, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    body = product_listing(args.products)
+    print(f'payload: {len(body)} bytes, {args.products} products')
+    print(f"{'codec':<6}{'level':>6}{'bytes':>10}{'ratio':>8}{'saved':>10}{'ms/op':>9}{'MB/s':>9}")
+
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                compressed = compress(body, encoding, level)
+            elapsed = (time.perf_counter() - started) / args.repeat
+            print(f'{encoding:<6}{level:>6}{len(compressed):>10}{len(body) / len(compressed):>8.2f}'
+                  f'{len(body) - len(compressed):>10}{elapsed * 1000:>9.2f}{len(body) / elapsed / 1e6:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+import pytest
+
+# app.backend.db читает настройки при импорте, поэтому окружение задаётся до импорта приложения
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL',
+                                       f'sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db')
+os.environ['DB_ECHO'] = '0'
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-with-at-least-32-bytes')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def schema():
+    from app.backend.db import create_schema
+    from app.backend.role_versions import role_versions
+
+    await create_schema()
+    await role_versions.refresh()
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import insert, select
+
+from app.api import app
+from app.backend.archive import restore, run_archival
+from app.backend.db import async_session_maker
+from app.backend.supplier_stats import refresh_supplier_stats
+from app.models import Category, Product, Review, SupplierStats, User, archive_tables
+from app.routers.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def reviewed_product(schema):
+    prefix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        supplier_id = await session.scalar(insert(User).values(username=prefix, email=f'{prefix}@example.com',
+                                                               is_supplier=True).returning(User.id))
+        category_id = await session.scalar(insert(Category).values(name=prefix, slug=prefix).returning(Category.id))
+        product_id = await session.scalar(insert(Product).values(name=prefix, slug=prefix, stock=1,
+                                                                 supplier_id=supplier_id,
+                                                                 category_id=category_id).returning(Product.id))
+        review_ids = (await session.scalars(insert(Review).returning(Review.id, sort_by_parameter_order=True), [
+            {'user_id': supplier_id, 'product_id': product_id, 'grade': grade, 'comment_date': datetime.now()}
+            for grade in (4, 5)
+        ])).all()
+        await session.commit()
+        await refresh_supplier_stats(session, supplier_id)
+    return supplier_id, product_id, review_ids
+
+
+async def review_count(supplier_id: int) -> int:
+    async with async_session_maker() as session:
+        return (await session.get(SupplierStats, supplier_id)).review_count
+
+
+async def test_delete_reviews_deactivates_review(reviewed_product):
+    supplier_id, _, review_ids = reviewed_product
+    token = await create_access_token('admin', 1, True, False, False)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test',
+                                 headers={'Authorization': f'Bearer {token}'}) as client:
+        response = await client.delete('/reviews/', params={'review_id': review_ids[0]})
+    assert response.status_code == 200
+
+    async with async_session_maker() as session:
+        assert (await session.get(Review, review_ids[0])).is_active is False
+    assert await review_count(supplier_id) == 1
+
+
+async def test_inactive_product_is_archived_with_its_reviews(reviewed_product):
+    supplier_id, product_id, review_ids = reviewed_product
+    async with async_session_maker() as session:
+        product = await session.get(Product, product_id)
+        product.is_active = False
+        product.deactivated_at = datetime.now() - timedelta(days=1)
+        await session.commit()
+
+    result = await run_archival(older_than=timedelta(hours=1))
+    assert result['archived']['products'] >= 1
+    assert await review_count(supplier_id) == 0
+    async with async_session_maker() as session:
+        assert await session.get(Product, product_id) is None
+        assert (await session.scalars(select(Review.id).where(Review.product_id == product_id))).all() == []
+        archived = archive_tables[Review]
+        assert len((await session.execute(select(archived).where(archived.c.product_id == product_id))).all()) == 2
+
+        assert await restore(session, Product, product_id) is not None
+    assert await review_count(supplier_id) == 2
+    async with async_session_maker() as session:
+        restored = (await session.scalars(select(Review.id).where(Review.product_id == product_id))).all()
+    assert sorted(restored) == sorted(review_ids)
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.backend.changes import changes_since, prune_changes, record_change, CHANGES_RETENTION
+from app.backend.db import async_session_maker
+from app.models import Change
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_committed_changes_are_visible_immediately(schema):
+    async with async_session_maker() as session:
+        since = max([change.seq for change in await changes_since(session, 0)], default=0)
+        await record_change(session, 'product', 1, 'update', 'visible')
+        await session.commit()
+
+        changes = await changes_since(session, since)
+    assert [change.slug for change in changes] == ['visible']
+
+
+async def test_prune_removes_only_expired_changes(schema):
+    async with async_session_maker() as session:
+        expired = datetime.now() - CHANGES_RETENTION - timedelta(hours=1)
+        await session.execute(insert(Change), [{'entity': 'product', 'entity_id': 1, 'action': 'update',
+                                                'slug': 'expired', 'created_at': expired}] * 3)
+        await record_change(session, 'product', 1, 'update', 'kept')
+        await session.commit()
+
+        assert await prune_changes(session, 2) == 2
+        assert await prune_changes(session, 2) == 1
+        assert await prune_changes(session, 2) == 0
+        slugs = [change.slug for change in await changes_since(session, 0)]
+    assert 'expired' not in slugs
+    assert 'kept' in slugs
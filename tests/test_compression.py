@@ -0,0 +1,67 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+from app.backend.compression import CompressionMiddleware, choose_encoding
+
+pytestmark = pytest.mark.anyio
+
+
+def test_choose_encoding_follows_quality_values():
+    encodings = ('br', 'zstd', 'gzip')
+    assert choose_encoding('gzip, br', encodings) == 'br'
+    assert choose_encoding('br;q=0.5, gzip;q=0.8', encodings) == 'gzip'
+    assert choose_encoding('br;q=0, *;q=0.1', encodings) == 'zstd'
+    assert choose_encoding('gzip;q=0', encodings) is None
+    assert choose_encoding('identity', encodings) is None
+    assert choose_encoding('GZIP;q=bad, gzip;q=0.3', ('gzip',)) == 'gzip'
+
+
+class ItemsApp:
+    def __init__(self, size: int = 1000):
+        self.size = size
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        body = json.dumps({'call': self.calls, 'items': 'x' * self.size}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 201 if scope['method'] == 'POST' else 200,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def client(app) -> httpx.AsyncClient:
+    # httpx сам распаковывает gzip, поэтому для проверки заголовков просим только его
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=CompressionMiddleware(app, minimum_size=500)),
+                             base_url='http://test', headers={'Accept-Encoding': 'gzip'})
+
+
+async def test_small_responses_are_not_compressed():
+    async with client(ItemsApp(size=1000)) as http:
+        large = await http.get('/items')
+    async with client(ItemsApp(size=10)) as http:
+        small = await http.get('/items')
+    assert large.headers['content-encoding'] == 'gzip'
+    assert large.headers['vary'] == 'Accept-Encoding'
+    assert 'content-encoding' not in small.headers
+
+
+def test_encoded_responses_are_passed_through():
+    body = gzip.compress(b'{}')
+    middleware = CompressionMiddleware(ItemsApp(), minimum_size=0)
+    start = {'type': 'http.response.start', 'status': 200,
+             'headers': [(b'content-type', b'application/json'), (b'content-encoding', b'gzip')]}
+    assert middleware.encode(start, body, 'gzip') == (200, start['headers'], body)
+
+
+async def test_writes_invalidate_cached_listings():
+    app = ItemsApp()
+    async with client(app) as http:
+        first = await http.get('/products/')
+        cached = await http.get('/products/')
+        await http.post('/products/', json={})
+        fresh = await http.get('/products/')
+    assert first.json()['call'] == cached.json()['call'] == 1
+    assert fresh.json()['call'] == 3
@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from sqlalchemy import event, insert
+
+from app.api import app
+from app.backend.db import async_session_maker, engine
+from app.backend.db_depends import LazySession
+from app.models import Category
+from app.routers.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def categories(schema):
+    async with async_session_maker() as session:
+        await session.execute(insert(Category), [{'name': f'Category {number}', 'slug': f'pool-category-{number}'}
+                                                 for number in range(20)])
+        await session.commit()
+
+
+@pytest.fixture
+def checkouts():
+    # Сколько раз соединение бралось из пула и сколько их было занято одновременно
+    stats = {'count': 0, 'peak': 0}
+
+    def on_checkout(*args):
+        stats['count'] += 1
+        stats['peak'] = max(stats['peak'], engine.pool.checkedout())
+
+    event.listen(engine.sync_engine, 'checkout', on_checkout)
+    yield stats
+    event.remove(engine.sync_engine, 'checkout', on_checkout)
+
+
+async def client(user_id: int, is_admin: bool = False) -> httpx.AsyncClient:
+    token = await create_access_token(f'user{user_id}', user_id, is_admin, False, not is_admin)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test',
+                             headers={'Authorization': f'Bearer {token}'})
+
+
+async def test_rejected_and_cached_requests_do_not_check_out_connections(categories, checkouts):
+    async with await client(2) as customer:
+        warm = await customer.get('/categories/')
+        assert warm.status_code == 200
+        checkouts['count'] = 0
+
+        for _ in range(10):
+            rejected = await customer.post('/categories/', json={'name': 'Forbidden'})
+            assert rejected.status_code == 403
+            cached = await customer.get('/categories/')
+            assert cached.status_code == 200
+            assert engine.pool.checkedout() == 0
+
+    assert checkouts['count'] == 0
+
+
+async def test_write_handler_holds_one_connection_at_a_time(schema, checkouts):
+    async with await client(1, is_admin=True) as admin:
+        for number in range(5):
+            response = await admin.post('/categories/', json={'name': f'Written {number}'})
+            assert response.status_code == 201
+            assert engine.pool.checkedout() == 0
+
+    assert checkouts['count'] > 0
+    assert checkouts['peak'] == 1
+
+
+async def test_commit_releases_connection(schema):
+    db = LazySession()
+    assert not db.is_open
+    assert engine.pool.checkedout() == 0
+
+    await db.execute(insert(Category).values(name='Released', slug='released'))
+    assert engine.pool.checkedout() == 1
+
+    await db.commit()
+    assert not db.is_open
+    assert engine.pool.checkedout() == 0
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.backend.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+
+def test_in_flight_entries_are_not_evicted():
+    store = IdempotencyStore(max_keys=1)
+    in_flight = store.begin(('user', b'first'), 'a')
+
+    store.begin(('user', b'second'), 'b')
+    assert store.get(('user', b'first')) is in_flight
+    assert not in_flight.done.is_set()
+
+    store.finish(('user', b'first'), in_flight, (201, [], b'{}'))
+    store.begin(('user', b'third'), 'c')
+    assert store.get(('user', b'first')) is None
+    assert store.get(('user', b'second')) is not None
+
+
+class CountingApp:
+    def __init__(self, status: int = 201):
+        self.status = status
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await receive()
+        await self.release.wait()
+        body = json.dumps({'call': self.calls}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': self.status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=IdempotencyMiddleware(app)), base_url='http://test',
+                             headers={'Idempotency-Key': 'key'})
+
+
+async def test_repeated_request_is_replayed():
+    app = CountingApp()
+    async with client(app) as http:
+        first = await http.post('/reviews/', json={'grade': 5})
+        second = await http.post('/reviews/', json={'grade': 5})
+    assert app.calls == 1
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers['idempotent-replayed'] == 'true'
+    assert 'idempotent-replayed' not in first.headers
+
+
+async def test_key_reused_with_another_body_is_rejected():
+    app = CountingApp()
+    async with client(app) as http:
+        await http.post('/reviews/', json={'grade': 5})
+        response = await http.post('/reviews/', json={'grade': 1})
+    assert response.status_code == 422
+    assert app.calls == 1
+
+
+async def test_concurrent_duplicate_waits_for_first_request():
+    app = CountingApp()
+    app.release.clear()
+    async with client(app) as http:
+        first = asyncio.create_task(http.post('/reviews/', json={'grade': 5}))
+        second = asyncio.create_task(http.post('/reviews/', json={'grade': 5}))
+        await asyncio.sleep(0.05)
+        assert app.calls == 1
+        assert not second.done()
+        app.release.set()
+        first, second = await first, await second
+    assert app.calls == 1
+    assert second.json() == first.json()
+    assert second.headers['idempotent-replayed'] == 'true'
+
+
+async def test_server_error_is_not_stored():
+    app = CountingApp(status=503)
+    async with client(app) as http:
+        await http.post('/reviews/', json={'grade': 5})
+        app.status = 201
+        response = await http.post('/reviews/', json={'grade': 5})
+    assert app.calls == 2
+    assert response.status_code == 201
+    assert 'idempotent-replayed' not in response.headers
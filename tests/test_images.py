@@ -0,0 +1,36 @@
+import os
+
+from app.backend.images import DerivativeCache
+
+
+def write(cache: DerivativeCache, name: str, size: int, atime: int):
+    path = cache.path(name)
+    path.write_bytes(b'0' * size)
+    os.utime(path, (atime, atime))
+
+
+def test_cache_is_shared_through_directory(tmp_path):
+    cache = DerivativeCache(tmp_path, max_bytes=25)
+    other_worker = DerivativeCache(tmp_path, max_bytes=25)
+    write(cache, 'old-64.webp', 10, 1)
+    write(cache, 'used-64.webp', 10, 2)
+
+    assert other_worker.get('used-64.webp') == tmp_path / 'used-64.webp'
+    assert other_worker.total() == 20
+
+    write(other_worker, 'new-64.webp', 10, 3)
+    other_worker.add('new-64.webp')
+    assert cache.get('old-64.webp') is None
+    assert cache.get('used-64.webp') is not None
+    assert cache.total() == 20
+
+
+def test_pin_outlives_eviction(tmp_path):
+    cache = DerivativeCache(tmp_path, max_bytes=10)
+    write(cache, 'a-64.webp', 10, 1)
+    pin = cache.pin('a-64.webp')
+
+    write(cache, 'b-64.webp', 10, 2)
+    cache.add('b-64.webp')
+    assert cache.get('a-64.webp') is None
+    assert pin.read_bytes() == b'0' * 10
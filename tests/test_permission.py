@@ -0,0 +1,79 @@
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import insert, select
+
+from app.api import app
+from app.backend.db import async_session_maker
+from app.models import RoleVersion, User
+from app.routers.auth import bcrypt_context, create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def users(schema):
+    prefix = uuid.uuid4().hex[:8]
+    roles = {
+        'customer': {},
+        'supplier': {'is_supplier': True, 'is_customer': False},
+        'admin': {'is_admin': True},
+        'inactive': {'is_active': False},
+    }
+    async with async_session_maker() as session:
+        ids = {}
+        for name, values in roles.items():
+            ids[name] = await session.scalar(insert(User).values(
+                username=f'{prefix}-{name}', email=f'{prefix}-{name}@example.com',
+                hashed_password=bcrypt_context.hash('password'), **values).returning(User.id))
+        await session.commit()
+    return prefix, ids
+
+
+def client(token: str | None = None) -> httpx.AsyncClient:
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test', headers=headers)
+
+
+async def make_suppliers(admin_id: int, user_ids: list[int]) -> httpx.Response:
+    token = await create_access_token('admin', admin_id, True, False, False)
+    async with client(token) as admin:
+        return await admin.patch('/permission/bulk', json={'user_ids': user_ids, 'is_supplier': True})
+
+
+async def role_version(user_id: int) -> int | None:
+    async with async_session_maker() as session:
+        return await session.scalar(select(RoleVersion.version).where(RoleVersion.user_id == user_id))
+
+
+async def test_bulk_permission_skips_admin_inactive_and_unchanged_users(users):
+    _, ids = users
+    response = await make_suppliers(ids['admin'], list(ids.values()))
+    assert response.status_code == 200
+    assert response.json()['updated'] == [ids['customer']]
+    assert response.json()['skipped'] == sorted([ids['supplier'], ids['admin'], ids['inactive']])
+
+    async with async_session_maker() as session:
+        assert (await session.get(User, ids['admin'])).is_supplier is False
+        assert (await session.get(User, ids['inactive'])).is_supplier is False
+    assert await role_version(ids['customer']) == 1
+    assert await role_version(ids['supplier']) is None
+
+
+async def test_token_is_rejected_after_role_change_until_login(users):
+    prefix, ids = users
+    stale_token = await create_access_token(f'{prefix}-customer', ids['customer'], False, False, True)
+    await make_suppliers(ids['admin'], [ids['customer']])
+
+    async with client(stale_token) as customer:
+        response = await customer.get('/auth/read_current_user')
+    assert response.status_code == 401
+
+    async with client() as anonymous:
+        response = await anonymous.post('/auth/token', data={'username': f'{prefix}-customer',
+                                                              'password': 'password'})
+    async with client(response.json()['access_token']) as supplier:
+        response = await supplier.get('/auth/read_current_user')
+    assert response.status_code == 200
+    assert response.json()['User']['is_supplier'] is True
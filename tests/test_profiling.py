@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.api import app
+from app.backend.profiling import SamplingProfiler
+from app.routers.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def get(path: str, is_admin: bool | None = None, **headers) -> httpx.Response:
+    if is_admin is not None:
+        token = await create_access_token('profiler', 1, is_admin, False, not is_admin)
+        headers['Authorization'] = f'Bearer {token}'
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        return await client.get(path, headers=headers)
+
+
+async def test_server_timing_is_only_sent_to_admins(schema):
+    assert 'server-timing' not in (await get('/')).headers
+    assert 'server-timing' not in (await get('/', **{'X-Server-Timing': '1'})).headers
+    assert 'server-timing' not in (await get('/', is_admin=False, **{'X-Server-Timing': '1'})).headers
+    assert 'server-timing' not in (await get('/', is_admin=True)).headers
+
+    response = await get('/', is_admin=True, **{'X-Server-Timing': '1'})
+    assert 'total;dur=' in response.headers['server-timing']
+
+
+async def test_request_profile_is_scoped_to_its_task(schema):
+    response = await get('/', is_admin=True, **{'X-Profile': '1'})
+    assert response.headers['x-profile-scope'] == 'task'
+    assert response.headers['x-profile-original-status'] == '200'
+
+
+async def test_task_profiler_skips_other_tasks():
+    async def busy():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+
+    other = asyncio.create_task(busy())
+    profiler = SamplingProfiler(task=asyncio.current_task())
+    profiler.start()
+    await other
+    assert 'busy' not in profiler.stop()
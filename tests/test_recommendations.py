@@ -0,0 +1,96 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.backend import recommendations
+from app.backend.db import async_session_maker
+from app.backend.recommendations import compute_related, mark_related_stale, refresh_stale_related, np
+from app.models import Category, Product, RelatedProducts, Review, User
+
+pytestmark = pytest.mark.skipif(np is None, reason='numpy and scipy are not installed')
+
+REVIEWS = {2: [1, 2, 3], 3: [1, 2], 4: [2, 4], 5: [1, 3], 6: [5, 6]}
+
+
+def review_pairs(users=None):
+    return np.array([(user_id, product_id) for user_id, product_ids in REVIEWS.items()
+                     for product_id in product_ids if users is None or user_id in users], dtype=np.int64)
+
+
+def test_partial_refresh_matches_full_rebuild():
+    full = compute_related(review_pairs(), None, None)
+
+    # Для товаров 1 и 4 нужны только отзывы оценивших их пользователей и общее число оценивших
+    reviewer_counts = {product_id: sum(product_id in product_ids for product_ids in REVIEWS.values())
+                       for product_id in range(1, 7)}
+    partial = compute_related(review_pairs({2, 3, 4, 5}), [1, 4], reviewer_counts)
+
+    assert partial == {1: full[1], 4: full[4]}
+    assert full[1] == [3, 2]
+    assert full[5] == [6]
+
+
+@pytest.fixture
+async def reviewed_products(schema):
+    prefix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        user_ids = (await session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {'username': f'{prefix}-{number}', 'email': f'{prefix}-{number}@example.com'} for number in range(2)
+        ])).all()
+        category_id = await session.scalar(insert(Category).values(name=prefix, slug=prefix).returning(Category.id))
+        product_ids = (await session.scalars(insert(Product).returning(Product.id, sort_by_parameter_order=True), [
+            {'name': prefix, 'slug': f'{prefix}-{number}', 'stock': 1, 'category_id': category_id}
+            for number in range(3)
+        ])).all()
+        await session.execute(insert(Review), [
+            {'user_id': user_id, 'product_id': product_id, 'grade': 5, 'comment_date': datetime.now()}
+            for user_id in user_ids for product_id in product_ids[:2]
+        ])
+        for user_id in user_ids:
+            await mark_related_stale(session, product_ids[0], user_id)
+        await session.commit()
+    return user_ids, product_ids
+
+
+async def related_rows(product_ids) -> dict:
+    async with async_session_maker() as session:
+        rows = await session.scalars(select(RelatedProducts).where(RelatedProducts.product_id.in_(product_ids)))
+        return {row.product_id: (row.related_ids, row.is_stale) for row in rows.all()}
+
+
+@pytest.mark.anyio
+async def test_rows_marked_during_refresh_stay_stale(reviewed_products, monkeypatch):
+    user_ids, product_ids = reviewed_products
+    load_reviews = recommendations.load_reviews
+
+    async def load_and_review(db, targets):
+        loaded = await load_reviews(db, targets)
+        # Отзыв, закоммиченный между чтением данных и записью результата
+        async with async_session_maker() as session:
+            await session.execute(insert(Review).values(user_id=user_ids[0], product_id=product_ids[2], grade=4,
+                                                        comment_date=datetime.now()))
+            await mark_related_stale(session, product_ids[2], user_ids[0])
+            await session.commit()
+        return loaded
+
+    monkeypatch.setattr(recommendations, 'load_reviews', load_and_review)
+    await refresh_stale()
+    monkeypatch.setattr(recommendations, 'load_reviews', load_reviews)
+
+    rows = await related_rows(product_ids)
+    assert rows[product_ids[0]][1] is True
+    assert rows[product_ids[1]][1] is True
+    assert rows[product_ids[2]][1] is True
+
+    await refresh_stale()
+    rows = await related_rows(product_ids)
+    assert rows[product_ids[0]] == ([product_ids[1], product_ids[2]], False)
+    assert rows[product_ids[2]] == ([product_ids[0], product_ids[1]], False)
+    recommendations.shutdown_related_pool()
+
+
+async def refresh_stale():
+    async with async_session_maker() as session:
+        await refresh_stale_related(session)
@@ -0,0 +1,42 @@
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.api import app
+from app.backend.db import async_session_maker
+from app.models import Category
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def category(schema):
+    slug = f'snapshot-{uuid.uuid4().hex[:8]}'
+    async with async_session_maker() as session:
+        await session.execute(insert(Category).values(name='Snapshot', slug=slug))
+        await session.commit()
+    return slug
+
+
+async def get_listing(slug: str, **headers) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        return await client.get(f'/products/{slug}', headers=headers)
+
+
+async def test_listing_is_revalidated_by_etag(category):
+    response = await get_listing(category, **{'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['cache-control'] == 'public, no-cache'
+
+    revalidated = await get_listing(category, **{'If-None-Match': response.headers['etag']})
+    assert revalidated.status_code == 304
+
+
+async def test_gzip_with_zero_quality_is_not_served(category):
+    response = await get_listing(category, **{'Accept-Encoding': 'gzip;q=0'})
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert response.json() == []
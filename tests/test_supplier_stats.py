@@ -0,0 +1,68 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.api import app
+from app.backend.db import async_session_maker
+from app.backend.supplier_stats import get_supplier_stats, refresh_supplier_stats
+from app.models import Category, Product, User
+from app.routers.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def supplier_product(schema):
+    prefix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        supplier_id = await session.scalar(insert(User).values(username=prefix, email=f'{prefix}@example.com',
+                                                               is_supplier=True).returning(User.id))
+        category_id = await session.scalar(insert(Category).values(name=prefix, slug=prefix).returning(Category.id))
+        product_id = await session.scalar(insert(Product).values(name=prefix, slug=prefix, stock=1,
+                                                                 supplier_id=supplier_id,
+                                                                 category_id=category_id).returning(Product.id))
+        await session.commit()
+    return supplier_id, product_id
+
+
+async def stats(supplier_id: int) -> dict:
+    async with async_session_maker() as session:
+        return await get_supplier_stats(session, supplier_id)
+
+
+async def test_concurrent_first_reads_do_not_collide(supplier_product):
+    supplier_id, _ = supplier_product
+
+    async def refresh():
+        async with async_session_maker() as session:
+            return await refresh_supplier_stats(session, supplier_id)
+
+    results = await asyncio.gather(refresh(), refresh())
+    assert [result.product_count for result in results] == [1, 1]
+
+
+async def test_review_days_follow_comment_date(supplier_product):
+    supplier_id, product_id = supplier_product
+    await stats(supplier_id)
+
+    token = await create_access_token('customer', supplier_id, False, False, True)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test',
+                                 headers={'Authorization': f'Bearer {token}'}) as client:
+        response = await client.post('/reviews/', json={
+            'user_id': supplier_id, 'product_id': product_id, 'comment': 'ok', 'grade': 5,
+            'comment_date': (datetime.now() - timedelta(days=10)).isoformat(),
+        })
+    assert response.status_code == 201
+
+    tracked = await stats(supplier_id)
+    assert (tracked['reviews_last_7_days'], tracked['reviews_last_30_days']) == (0, 1)
+
+    async with async_session_maker() as session:
+        await refresh_supplier_stats(session, supplier_id)
+    refreshed = await stats(supplier_id)
+    assert {key: refreshed[key] for key in tracked if key != 'refreshed_at'} == \
+           {key: tracked[key] for key in tracked if key != 'refreshed_at'}